@@ -1,6 +1,30 @@
-"""NSAppleScript wrapper — replaces all subprocess osascript calls."""
+"""NSAppleScript wrapper — replaces all subprocess osascript calls.
 
-import Foundation
+NSAppleScript may only be used from the main thread. serve(fn) runs the
+program (fn) on a worker thread and turns the main thread into the
+executor: every script, from whichever thread calls run(), is queued and
+executed there, so SOAP, WebSocket and sleeping threads can call run()
+concurrently. Short queries are served before scripts that drive the UI.
+Outside serve() scripts run inline on the calling (main) thread. call()
+puts other Apple Event senders (the ScriptingBridge Chrome backend) on the
+same path, so they are traced, timed and cancellable like scripts.
+"""
+
+import itertools
+import queue
+import sys
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+try:
+    import Foundation
+except ImportError:  # not macOS: only the fake Chrome backend and trace replay work
+    Foundation = None
+
+from lib import context, trace
 
 
 class AppleScriptError(Exception):
@@ -11,17 +35,268 @@ class AppleScriptError(Exception):
         self.error_number = error_number
 
 
-def run(source: str) -> str | None:
-    """Execute AppleScript and return the string result, or None if no result."""
+# Record keys AppleScript stores as four-char property codes rather than
+# user labels. Anything else not listed here keeps its raw code.
+_PROPERTY_KEYS = {
+    "ID  ": "id",
+    "pnam": "name",
+    "pidx": "index",
+    "pbnd": "bounds",
+    "pcls": "class",
+}
+
+
+def _fourcc(code: int) -> str:
+    """Convert an OSType integer to its four-character string (e.g. 'list')."""
+    return code.to_bytes(4, "big").decode("mac_roman")
+
+
+def _decode(desc) -> object:
+    """Convert an NSAppleEventDescriptor into plain Python values.
+
+    Lists become lists, records become dicts (user labels as keys), booleans,
+    integers and reals become bool/int/float; everything else is coerced to text.
+    """
+    kind = _fourcc(desc.descriptorType())
+    if kind == "null":
+        return None
+    if kind == "true":
+        return True
+    if kind == "fals":
+        return False
+    if kind == "bool":
+        return bool(desc.booleanValue())
+    if kind in ("long", "shor"):
+        return int(desc.int32Value())
+    if kind in ("comp", "magn"):
+        return int(desc.stringValue())
+    if kind in ("doub", "sing"):
+        return float(desc.doubleValue())
+    if kind == "list":
+        return [_decode(desc.descriptorAtIndex_(i)) for i in range(1, desc.numberOfItems() + 1)]
+    if kind == "reco":
+        record = {}
+        for i in range(1, desc.numberOfItems() + 1):
+            key = _fourcc(desc.keywordForDescriptorAtIndex_(i))
+            value = desc.descriptorAtIndex_(i)
+            if key == "usrf":
+                # User-defined labels arrive as a flat [label, value, label, value, ...] list
+                fields = _decode(value)
+                record.update(zip(fields[::2], fields[1::2]))
+            else:
+                record[_PROPERTY_KEYS.get(key, key)] = _decode(value)
+        return record
+    return desc.stringValue()
+
+
+def _execute(source: str):
+    """Compile and execute AppleScript, returning the raw result descriptor."""
     script = Foundation.NSAppleScript.alloc().initWithSource_(source)
     result, error = script.executeAndReturnError_(None)
     if error is not None:
         number = error.get("NSAppleScriptErrorNumber")
         message = error.get("NSAppleScriptErrorBriefMessage", str(error))
         raise AppleScriptError(message, error_number=number)
-    if result is None:
-        return None
-    return result.stringValue()
+    return result
+
+
+def _as_string(result) -> str | None:
+    return None if result is None else result.stringValue()
+
+
+def _as_value(result) -> object:
+    return None if result is None else _decode(result)
+
+
+# --- Executor ---
+
+PRIORITY_QUERY = 0  # short reads: bounds, URLs, JS state checks
+PRIORITY_UI = 1  # scripts with delays or System Events UI scripting
+
+_queue: queue.PriorityQueue = queue.PriorityQueue()
+_sequence = itertools.count()  # FIFO within a priority
+_owner: threading.Thread | None = None  # the main thread while serve() runs
+_STOP = -1  # priority of the sentinel that ends serve(), ahead of any script
+
+# Per-caller latency: label -> [count, total seconds, max seconds]
+_latency: dict[str, list] = defaultdict(lambda: [0, 0.0, 0.0])
+_latency_lock = threading.Lock()
+
+
+def _default_priority(source: str) -> int:
+    if "System Events" in source or "delay" in source:
+        return PRIORITY_UI
+    return PRIORITY_QUERY
+
+
+def _caller() -> str:
+    """Name the first function outside this module on the stack, e.g. 'lib.chrome.focus_window'."""
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_globals.get("__name__") == __name__:
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    return f"{frame.f_globals.get('__name__')}.{frame.f_code.co_name}"
+
+
+def _record(label: str, seconds: float) -> None:
+    with _latency_lock:
+        entry = _latency[label]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+
+
+def _script(source: str, decode) -> Callable[[], object]:
+    """The job that runs source and decodes its result, traced."""
+    return lambda: trace.call(
+        "applescript",
+        {"source": source, "as": decode.__name__},
+        lambda: decode(_execute(source)),
+        errors={"AppleScriptError": AppleScriptError},
+    )
+
+
+def _timed(job: Callable[[], object], label: str):
+    start = time.perf_counter()
+    try:
+        return job()
+    finally:
+        _record(label, time.perf_counter() - start)
+
+
+def _execute_queued(item: tuple) -> None:
+    _, _, job, label, future = item
+    if not future.set_running_or_notify_cancel():
+        return
+    try:
+        future.set_result(_timed(job, label))
+    except BaseException as e:
+        future.set_exception(e)
+
+
+def serve(fn, *args, **kwargs):
+    """Run fn(*args, **kwargs) on a worker thread while the main thread executes its scripts.
+
+    Returns fn's result or raises its exception. Must be called from the
+    main thread, which does nothing but run queued scripts until fn returns.
+    """
+    global _owner
+    if threading.current_thread() is not threading.main_thread():
+        raise RuntimeError("applescript.serve() must be called from the main thread")
+    outcome: Future = Future()
+
+    def work() -> None:
+        try:
+            outcome.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            outcome.set_exception(e)
+        finally:
+            _queue.put((_STOP, next(_sequence), None, None, None))
+
+    _owner = threading.current_thread()
+    threading.Thread(target=work, name="gigaku", daemon=True).start()
+    try:
+        while True:
+            item = _queue.get()
+            if item[0] == _STOP:
+                break
+            _execute_queued(item)
+    finally:
+        _owner = None
+        # Scripts queued by other threads as fn finished still get an answer
+        while not _queue.empty():
+            item = _queue.get()
+            if item[0] != _STOP:
+                _execute_queued(item)
+    return outcome.result()
+
+
+def _submit(job: Callable[[], object], priority: int, label: str) -> Future:
+    future: Future = Future()
+    _queue.put((priority, next(_sequence), job, label, future))
+    return future
+
+
+def submit(source: str, priority: int | None = None) -> Future:
+    """Queue a script for the main thread. The future resolves to the string result.
+
+    Priority defaults to PRIORITY_UI for scripts that delay or use System
+    Events, PRIORITY_QUERY otherwise. Outside serve() the script runs now.
+    """
+    if _owner is None or threading.current_thread() is _owner:
+        future: Future = Future()
+        try:
+            future.set_result(_dispatch(source, _as_string))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    if priority is None:
+        priority = _default_priority(source)
+    return _submit(_script(source, _as_string), priority, _caller())
+
+
+def _dispatch(source: str, decode):
+    return _run_job(_script(source, decode), _default_priority(source), _caller())
+
+
+def _run_job(job: Callable[[], object], priority: int, label: str):
+    context.check()  # a cancelled run issues no further Apple Events
+    if _owner is None or threading.current_thread() is _owner:
+        return _timed(job, label)
+    future = _submit(job, priority, label)
+    # A running script (and its `delay`s) can't be interrupted, but the caller
+    # can stop waiting for it; a still queued one is dropped.
+    while True:
+        try:
+            return future.result(timeout=0.25)
+        except FutureTimeout:
+            if context.current().cancelled:
+                future.cancel()
+                context.check()
+
+
+def call(
+    request: dict,
+    live: Callable[[], object],
+    label: str,
+    priority: int = PRIORITY_QUERY,
+) -> object:
+    """Run live() on the executor as if it were a script, and return its result.
+
+    For code that sends Apple Events without a script. It is traced as an
+    "applescript" call keyed by request, so live() must return JSON values.
+    Its latency is recorded under label.
+    """
+    return _run_job(
+        lambda: trace.call("applescript", request, live, errors={"AppleScriptError": AppleScriptError}),
+        priority,
+        label,
+    )
+
+
+def executor_stats() -> dict:
+    """Return queue depth and per-caller script latency (count, mean, max seconds)."""
+    with _latency_lock:
+        latency = {
+            label: {"count": count, "mean": total / count, "max": worst}
+            for label, (count, total, worst) in _latency.items()
+        }
+    return {"queue_depth": _queue.qsize(), "latency": latency}
+
+
+def run(source: str) -> str | None:
+    """Execute AppleScript and return the string result, or None if no result."""
+    return _dispatch(source, _as_string)
+
+
+def run_value(source: str) -> object:
+    """Execute AppleScript and return the result as Python values.
+
+    Lets one script return a whole snapshot, e.g. a list of records
+    {wid:..., wbounds:..., urls:...} decodes to a list of dicts.
+    """
+    return _dispatch(source, _as_value)
 
 
 def run_int(source: str) -> int:
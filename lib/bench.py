@@ -0,0 +1,171 @@
+"""Micro-benchmark runner for the standalone step scripts (`gigaku bench`).
+
+Runs a step's `__main__` entry repeatedly and reports min/median/p95 wall
+time plus, per run, AppleScript calls, SOAP requests, other TV traffic and
+the step's own context.sleep() calls (sleeps on other threads, e.g. trace
+replay latency, don't count). Results are compared against a baseline JSON keyed by step and
+arguments; --save stores the current run as the new baseline.
+
+Runs go against whatever backends the environment selects, e.g.
+GIGAKU_CHROME_BACKEND=fake or GIGAKU_REPLAY=trace.jsonl for runs without
+Chrome or the TV.
+"""
+
+import argparse
+import json
+import os
+import runpy
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from contextlib import contextmanager
+
+from lib import context, trace
+from lib.config import BENCH_BASELINE_PATH, SETUP_BUDGET
+
+# A metric more than this fraction (plus a small absolute slack for noise)
+# above its baseline is a regression. min is informational only.
+_TOLERANCE = 0.2
+_SLACK = 0.01
+
+_counts: Counter = Counter()
+
+
+def _counting(owner, name: str, key: str, seconds_arg: bool = False, this_thread: bool = False) -> Callable[[], None]:
+    """Wrap owner.name so each call bumps _counts[key] (and adds slept seconds).
+
+    this_thread limits counting to calls from the calling thread. Returns a
+    function that restores the original.
+    """
+    original = getattr(owner, name)
+    thread = threading.get_ident()
+
+    def wrapper(*args, **kwargs):
+        if not this_thread or threading.get_ident() == thread:
+            _counts[key] += 1
+            if seconds_arg:
+                _counts[f"{key}_seconds"] += args[-1]
+        return original(*args, **kwargs)
+
+    setattr(owner, name, wrapper)
+    return lambda: setattr(owner, name, original)
+
+
+@contextmanager
+def _instrumented():
+    """Count the step's sleeps and SOAP requests while the block runs."""
+    restores = [_counting(context.RunContext, "sleep", "sleeps", seconds_arg=True, this_thread=True)]
+    try:
+        from lib import tv
+    except ImportError:  # TV dependencies missing: no SOAP to count
+        pass
+    else:
+        restores.append(_counting(tv, "_soap_request", "soap"))
+    try:
+        yield
+    finally:
+        for restore in restores:
+            restore()
+
+
+def _module_name(step: str) -> str:
+    name = step.removesuffix(".py").rsplit("/", 1)[-1]
+    return f"steps.{name if name.startswith('step_') else 'step_' + name}"
+
+
+def _run_once(module: str, args: list[str]) -> dict:
+    """Run the step's __main__ once. Returns seconds and call counts."""
+    _counts.clear()
+    before = Counter(trace.summary()["calls"])
+    context.start(SETUP_BUDGET, "bench")
+    sys.argv = [module, *args]
+    start = time.perf_counter()
+    try:
+        runpy.run_module(module, run_name="__main__")
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            raise
+    seconds = time.perf_counter() - start
+    calls = Counter(trace.summary()["calls"]) - before
+    return {
+        "seconds": seconds,
+        "applescript": calls["applescript"],
+        "soap": _counts["soap"],
+        "tv_other": calls["http"] + calls["ws"] + calls["ssdp"] + calls["tcp"] - _counts["soap"],
+        "sleeps": _counts["sleeps"],
+        "sleep_seconds": _counts["sleeps_seconds"],
+    }
+
+
+def _p95(values: list[float]) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+
+def _summarize(runs: list[dict]) -> dict:
+    seconds = [run["seconds"] for run in runs]
+    result = {"min": min(seconds), "median": statistics.median(seconds), "p95": _p95(seconds)}
+    for key in ("applescript", "soap", "tv_other", "sleeps", "sleep_seconds"):
+        result[key] = statistics.median(run[key] for run in runs)
+    return result
+
+
+def _load_baselines(path: str) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _compare(result: dict, baseline: dict) -> list[str]:
+    """Print result next to the baseline. Returns the regressed metric names."""
+    regressions = []
+    print(f"  {'':<14} {'now':>9} {'baseline':>9}")
+    for key, value in result.items():
+        old = baseline.get(key)
+        if old is None:
+            print(f"  {key:<14} {value:>9.3f}")
+            continue
+        worse = key != "min" and value > old * (1 + _TOLERANCE) + _SLACK
+        if worse:
+            regressions.append(key)
+        print(f"  {key:<14} {value:>9.3f} {old:>9.3f}{'  REGRESSION' if worse else ''}")
+    return regressions
+
+
+def main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(prog="gigaku bench", description=__doc__.splitlines()[0])
+    parser.add_argument("step", help="step name, e.g. pin_toolbar or step_pin_toolbar")
+    parser.add_argument("args", nargs="*", help="arguments passed to the step's __main__")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--baseline", default=BENCH_BASELINE_PATH, help="baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="store this run as the baseline")
+    options = parser.parse_args(argv)
+
+    module = _module_name(options.step)
+    key = " ".join([module, *options.args])
+
+    print(f"Benchmarking {key}: {options.warmup} warmup, {options.repeat} runs")
+    with _instrumented():
+        for _ in range(options.warmup):
+            _run_once(module, options.args)
+        runs = [_run_once(module, options.args) for _ in range(options.repeat)]
+    result = _summarize(runs)
+
+    baselines = _load_baselines(options.baseline)
+    print(f"\n{key} (seconds; counts are per-run medians):")
+    regressions = _compare(result, baselines.get(key, {}))
+
+    if options.save:
+        baselines[key] = result
+        with open(options.baseline, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {os.path.relpath(options.baseline)}")
+    elif regressions:
+        print(f"Regressed vs baseline: {', '.join(regressions)}")
+        raise SystemExit(1)
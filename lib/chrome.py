@@ -1,18 +1,45 @@
 """Chrome bookmarks reading, window open/close/fullscreen."""
 
 import json
-import time
+import os
+from collections.abc import Callable
+from dataclasses import dataclass
 
-from lib import applescript
+from lib import applescript, state
 from lib.applescript import AppleScriptError
-from lib.config import CHROME_BOOKMARKS_PATH, CI_FOLDER_NAME
+from lib.config import CHROME_BACKEND, CHROME_BOOKMARKS_PATH, CI_FOLDER_NAME
 from lib.display import DisplayInfo
+from lib.history import WaitBudget
 
 
 class BookmarkError(Exception):
     """Raised when CI bookmarks are missing or misconfigured."""
 
 
+@dataclass(frozen=True)
+class Tab:
+    window_id: int
+    tab_id: int
+    url: str
+    title: str
+
+
+Bounds = tuple[int, int, int, int]
+
+
+@dataclass(frozen=True)
+class WindowSpec:
+    """A Chrome window for open_windows(). bounds=None keeps Chrome's placement."""
+    url: str
+    bounds: Bounds | None = None
+    minimized: bool = False
+
+
+def is_running() -> bool:
+    """Whether Chrome is running. Asks System Events, so it never launches Chrome."""
+    return applescript.run('tell application "System Events" to return exists process "Google Chrome"') == "true"
+
+
 def dismiss_chrome_dialogs() -> None:
     """Dismiss Chrome dialogs: profile errors (OK), proxy auth (Cancel on sheets)."""
     source = '''\
@@ -77,6 +104,63 @@ end tell
 ''')
 
 
+def exec_js_batch(target: int | str, expressions: dict[str, str]) -> dict[str, object]:
+    """Evaluate several JavaScript expressions in one execution, returning {name: value}.
+
+    target is a window ID (active tab) or an extension ID. Expressions run in
+    order and must be expressions, not statement lists; wrap those in an IIFE.
+    One that throws yields None instead of failing the batch. Values come back
+    through JSON.stringify, so they can be strings, numbers, booleans or nested
+    objects.
+    """
+    fields = ", ".join(
+        f"{json.dumps(name)}: (function () {{ try {{ return ({expression}); }}"
+        " catch (e) { return null; } })()"
+        for name, expression in expressions.items()
+    )
+    js = f"JSON.stringify({{{fields}}})"
+    if isinstance(target, int):
+        result = exec_js_on_window(target, js)
+    else:
+        result = exec_js_on_extension(target, js)
+    return json.loads(result) if result else dict.fromkeys(expressions)
+
+
+def snapshot_tabs() -> list[Tab]:
+    """Return every tab of every Chrome window from a single script.
+
+    Uses `... of every tab of every window` so Chrome answers each property
+    for all tabs at once instead of one Apple Event per tab.
+    """
+    source = '''\
+tell application "Google Chrome"
+    return {id of every window, id of every tab of every window, URL of every tab of every window, title of every tab of every window}
+end tell'''
+    window_ids, tab_ids, urls, titles = applescript.run_value(source)
+    return [
+        Tab(window_id, tab_id, url, title)
+        for window_id, w_tab_ids, w_urls, w_titles in zip(window_ids, tab_ids, urls, titles)
+        for tab_id, url, title in zip(w_tab_ids, w_urls, w_titles)
+    ]
+
+
+def close_tabs(tabs: list[Tab]) -> None:
+    """Close the given tabs in one batched script. Tabs already gone are skipped."""
+    closes = "\n".join(
+        f"    try\n        close tab id {tab.tab_id} of window id {tab.window_id}\n    end try"
+        for tab in tabs
+    )
+    applescript.run(f'tell application "Google Chrome"\n{closes}\nend tell')
+
+
+def close_tabs_matching(predicate: Callable[[Tab], bool]) -> int:
+    """Close all tabs matching predicate. Returns the count closed."""
+    matches = [tab for tab in snapshot_tabs() if predicate(tab)]
+    if matches:
+        close_tabs(matches)
+    return len(matches)
+
+
 def _find_folder(node: dict, name: str) -> dict | None:
     """Recursively find a bookmark folder by name."""
     if node.get("type") == "folder" and node.get("name") == name:
@@ -102,12 +186,29 @@ def _find_ci_folder() -> dict:
     raise BookmarkError(f"Bookmark folder '{CI_FOLDER_NAME}' not found")
 
 
+def _cached_ci_bookmarks() -> dict | None:
+    """The ci_bookmarks state entry if it describes the current Bookmarks file."""
+    try:
+        mtime = os.stat(CHROME_BOOKMARKS_PATH).st_mtime
+    except OSError:
+        return None
+    cached = state.get("ci_bookmarks")
+    if isinstance(cached, dict) and cached.get("mtime") == mtime:
+        return cached
+    return None
+
+
 def validate_ci_bookmarks() -> None:
     """Validate all subfolders in the CI bookmark folder.
 
     Each subfolder must contain exactly 1 URL bookmark whose URL contains '.com/watch'.
-    Raises BookmarkError on the first invalid subfolder.
+    Raises BookmarkError on the first invalid subfolder. A valid result is
+    remembered (with the subfolder URLs) until the Bookmarks file changes.
     """
+    cached = _cached_ci_bookmarks()
+    if cached is not None and cached.get("valid"):
+        return
+    mtime = os.stat(CHROME_BOOKMARKS_PATH).st_mtime
     ci_folder = _find_ci_folder()
     subfolders = [
         child for child in ci_folder.get("children", [])
@@ -116,6 +217,7 @@ def validate_ci_bookmarks() -> None:
     if not subfolders:
         raise BookmarkError(f"No subfolders found in '{CI_FOLDER_NAME}'")
 
+    urls = {}
     for sub in subfolders:
         name = sub.get("name", "?")
         bookmarks = [
@@ -133,6 +235,8 @@ def validate_ci_bookmarks() -> None:
             raise BookmarkError(
                 f"Bookmark in {CI_FOLDER_NAME}/{name} does not contain '.com/watch':\n  {bm.get('name', '?')} — {bm['url']}"
             )
+        urls[name] = bm["url"]
+    state.put("ci_bookmarks", {"mtime": mtime, "valid": True, "urls": urls})
 
 
 def get_ci_bookmark_url(subfolder: str) -> str:
@@ -140,7 +244,11 @@ def get_ci_bookmark_url(subfolder: str) -> str:
 
     Looks for CI_FOLDER_NAME -> subfolder -> exactly 1 bookmark.
     Raises BookmarkError if any level is missing, empty, or has != 1 bookmark.
+    Served from the validate_ci_bookmarks() result while the file is unchanged.
     """
+    cached = _cached_ci_bookmarks()
+    if cached is not None and subfolder in cached.get("urls", {}):
+        return cached["urls"][subfolder]
     ci_folder = _find_ci_folder()
     sub = _find_folder(ci_folder, subfolder)
     if sub is None:
@@ -159,20 +267,23 @@ def get_ci_bookmark_url(subfolder: str) -> str:
     return urls[0]
 
 
-def close_windows_on_display(samsung: DisplayInfo) -> None:
+def close_windows_on_display(samsung: DisplayInfo, exclude: list[int] | None = None) -> None:
     """Close Chrome windows whose left edge is on the Samsung display.
 
     Two-pass: collect window IDs, then for each exit fullscreen and close.
+    Windows whose IDs are in exclude are left open.
     """
+    keep = ", ".join(str(wid) for wid in exclude or [])
     source = f'''\
 tell application "Google Chrome"
+    set keepIDs to {{{keep}}}
     set wIDs to {{}}
     set wCount to count of windows
     repeat with i from wCount to 1 by -1
         set w to window i
         set b to bounds of w
         set leftEdge to item 1 of b
-        if leftEdge >= {samsung.x} and leftEdge < {samsung.x + samsung.width} then
+        if leftEdge >= {samsung.x} and leftEdge < {samsung.x + samsung.width} and (id of w) is not in keepIDs then
             set end of wIDs to id of w
         end if
     end repeat
@@ -226,30 +337,78 @@ end repeat'''
         raise
 
 
-def open_url_in_new_window(url: str, samsung: DisplayInfo) -> int:
-    """Open a URL in a new Chrome window on the Samsung display. Returns window ID."""
-    x1 = samsung.x + 100
-    y1 = samsung.y + 100
-    x2 = samsung.x + samsung.width - 100
-    y2 = samsung.y + samsung.height - 100
+def display_bounds(display: DisplayInfo, inset: int = 0) -> Bounds:
+    """Bounds (left, top, right, bottom) covering a display, shrunk by inset on each side."""
+    return (
+        display.x + inset,
+        display.y + inset,
+        display.x + display.width - inset,
+        display.y + display.height - inset,
+    )
+
 
-    # Create window and load URL
-    window_id = applescript.run_int(f'''\
+# macOS clamps windows below the menu bar, so allow some slack when verifying
+_BOUNDS_TOLERANCE = 60
+
+
+def _bounds_match(actual: Bounds, expected: Bounds) -> bool:
+    return all(abs(a - e) <= _BOUNDS_TOLERANCE for a, e in zip(actual, expected))
+
+
+def create_windows(specs: list[WindowSpec]) -> list[int]:
+    """Create Chrome windows in one script, without activating Chrome. Returns IDs in spec order."""
+    lines = []
+    for i, spec in enumerate(specs):
+        lines.append(f"set w{i} to make new window")
+        if spec.bounds is not None:
+            x1, y1, x2, y2 = spec.bounds
+            lines.append(f"set bounds of w{i} to {{{x1}, {y1}, {x2}, {y2}}}")
+        lines.append(f'set URL of active tab of w{i} to "{spec.url}"')
+        if spec.minimized:
+            lines.append(f"set minimized of w{i} to true")
+    ids = ", ".join(f"id of w{i}" for i in range(len(specs)))
+    body = "\n    ".join(lines)
+    result = applescript.run_value(f'''\
 tell application "Google Chrome"
-    activate
-    delay 0.5
-    set newWindow to make new window
-    delay 0.5
-    set URL of active tab of newWindow to "{url}"
-    delay 1
-    return id of newWindow
+    {body}
+    return {{{ids}}}
 end tell''')
+    return [int(window_id) for window_id in result]
 
-    # macOS Sequoia auto-tiles new windows (AXFullScreen=true in tile mode),
-    # which blocks Chrome set bounds from working cross-display.
-    # Fix: exit tile-fullscreen via System Events, then set bounds.
-    applescript.run(f'''\
-tell application "Google Chrome" to activate
+
+def open_windows(specs: list[WindowSpec]) -> list[int]:
+    """Create several Chrome windows at once. Returns window IDs in spec order.
+
+    Each window gets its URL and final bounds as it is created, with no fixed
+    delays and without activating Chrome. Placement is then verified with one
+    list_windows() call. A window that macOS put somewhere else (Sequoia
+    auto-tiling) is moved with place_window().
+    """
+    window_ids = create_windows(specs)
+    placed = [(window_id, spec.bounds) for window_id, spec in zip(window_ids, specs)
+              if spec.bounds is not None and not spec.minimized]
+    if placed:
+        actual = dict(list_windows())
+        for window_id, bounds in placed:
+            if window_id in actual and not _bounds_match(actual[window_id], bounds):
+                place_window(window_id, bounds)
+    return window_ids
+
+
+def open_url_in_new_window(url: str, samsung: DisplayInfo) -> int:
+    """Open a URL in a new Chrome window on the Samsung display. Returns window ID."""
+    window_id = open_windows([WindowSpec(url, display_bounds(samsung, inset=100))])[0]
+    focus_window(window_id)
+    return window_id
+
+
+def exit_tile_fullscreen() -> None:
+    """Take Chrome's front window out of macOS tile-fullscreen, if it is in it.
+
+    macOS Sequoia auto-tiles new windows (AXFullScreen=true in tile mode),
+    which blocks Chrome set bounds from working cross-display.
+    """
+    applescript.run('''\
 delay 0.3
 tell application "System Events"
     tell process "Google Chrome"
@@ -257,23 +416,99 @@ tell application "System Events"
             if subrole of w is "AXStandardWindow" then
                 if value of attribute "AXFullScreen" of w then
                     set value of attribute "AXFullScreen" of w to false
+                    delay 1
                 end if
                 exit repeat
             end if
         end repeat
     end tell
-end tell
-delay 1
+end tell''')
+
+
+def place_window(window_id: int, bounds: Bounds) -> None:
+    """Bring a Chrome window to front and set its bounds, leaving tile-fullscreen first."""
+    focus_window(window_id)
+    exit_tile_fullscreen()
+    set_window_bounds(window_id, bounds)
+
+
+def move_window_to_display(window_id: int, samsung: DisplayInfo, bounds: Bounds | None = None) -> None:
+    """Bring a Chrome window to front and place it on the Samsung display.
+
+    bounds defaults to the display inset by 100px. A window already there
+    (e.g. created in place by open_windows) is only brought to front.
+    """
+    bounds = bounds or display_bounds(samsung, inset=100)
+    if _bounds_match(get_window_bounds(window_id), bounds):
+        focus_window(window_id)
+    else:
+        place_window(window_id, bounds)
+
+
+def set_window_url(window_id: int, url: str) -> None:
+    """Navigate the active tab of a Chrome window to a URL."""
+    applescript.run(f'''\
+tell application "Google Chrome"
+    repeat with w in windows
+        if (id of w as text) = "{window_id}" then
+            set URL of active tab of w to "{url}"
+            return
+        end if
+    end repeat
+    error "Chrome window {window_id} not found"
+end tell''')
+
+
+def close_window(window_id: int) -> None:
+    """Close a Chrome window by ID. Does nothing if the window is gone."""
+    applescript.run(f'''\
+tell application "Google Chrome"
+    repeat with w in windows
+        if (id of w as text) = "{window_id}" then
+            close w
+            return
+        end if
+    end repeat
+end tell''')
+
+
+def list_windows() -> list[tuple[int, tuple[int, int, int, int]]]:
+    """Return (window ID, bounds) for every Chrome window, front to back."""
+    result = applescript.run_value('''\
+tell application "Google Chrome"
+    return {id of every window, bounds of every window}
+end tell''')
+    window_ids, bounds = result
+    return [(window_id, tuple(b)) for window_id, b in zip(window_ids, bounds)]
+
+
+def get_window_bounds(window_id: int) -> tuple[int, int, int, int]:
+    """Return a Chrome window's bounds as (left, top, right, bottom)."""
+    result = applescript.run_value(f'''\
+tell application "Google Chrome"
+    repeat with w in windows
+        if (id of w as text) = "{window_id}" then
+            return bounds of w
+        end if
+    end repeat
+    error "Chrome window {window_id} not found"
+end tell''')
+    return tuple(result)
+
+
+def set_window_bounds(window_id: int, bounds: tuple[int, int, int, int]) -> None:
+    """Set a Chrome window's bounds as (left, top, right, bottom)."""
+    x1, y1, x2, y2 = bounds
+    applescript.run(f'''\
 tell application "Google Chrome"
     repeat with w in windows
         if (id of w as text) = "{window_id}" then
             set bounds of w to {{{x1}, {y1}, {x2}, {y2}}}
-            exit repeat
+            return
         end if
     end repeat
-end tell'''
-    )
-    return window_id
+    error "Chrome window {window_id} not found"
+end tell''')
 
 
 def _check_fullscreen(window_id: int) -> bool:
@@ -301,7 +536,7 @@ tell application "System Events"
     end tell
 end tell
 return false'''
-    return applescript.run(source) == "true"
+    return applescript.run_value(source) is True
 
 
 def _bring_to_front_and_toggle(window_id: int) -> None:
@@ -352,7 +587,8 @@ end tell'''
 def make_window_fullscreen(window_id: int) -> bool:
     """Make a specific Chrome window fullscreen by ID.
 
-    Verifies via AXFullScreen after toggling, retries up to 3 times.
+    Verifies via AXFullScreen after toggling, polling for the animation to
+    finish within a budget learned from past runs, and retries up to 3 times.
     Each check uses fresh System Events window references to avoid stale refs
     after macOS moves the window to its own Space.
     Returns True if fullscreen was toggled, False if already fullscreen.
@@ -362,8 +598,55 @@ def make_window_fullscreen(window_id: int) -> bool:
 
     for _ in range(3):
         _bring_to_front_and_toggle(window_id)
-        time.sleep(2)  # wait for macOS fullscreen animation
-        if _check_fullscreen(window_id):
-            return True
+        # Wait for the macOS fullscreen animation
+        wait = WaitBudget("fullscreen_animation", timeout=2, interval=0.5)
+        for _ in wait.polls():
+            if _check_fullscreen(window_id):
+                wait.done()
+                return True
 
     raise RuntimeError(f"Failed to fullscreen window {window_id} after 3 retries")
+
+
+# --- Backend selection ---
+# The window and tab primitives above (snapshot_tabs, close_tabs,
+# create_windows, list_windows, get/set_window_bounds, set_window_url,
+# focus_window, exec_js_on_window/_extension, close_window) can be served by a
+# backend that skips AppleScript compilation. The fake backend also replaces
+# exit_tile_fullscreen and is_running; the rest of the System Events scripting
+# (dialogs, fullscreen, keystrokes) always goes through AppleScript. Rebinding
+# here also redirects callers inside this module, since they look the names up
+# at call time.
+
+if CHROME_BACKEND == "scriptingbridge":
+    from lib.chrome_sb import (  # noqa: E402,F811
+        close_tabs,
+        close_window,
+        create_windows,
+        exec_js_on_extension,
+        exec_js_on_window,
+        focus_window,
+        get_window_bounds,
+        list_windows,
+        set_window_bounds,
+        set_window_url,
+        snapshot_tabs,
+    )
+elif CHROME_BACKEND == "fake":
+    from lib.chrome_fake import (  # noqa: E402,F811
+        close_tabs,
+        close_window,
+        create_windows,
+        exec_js_on_extension,
+        exec_js_on_window,
+        exit_tile_fullscreen,
+        focus_window,
+        get_window_bounds,
+        is_running,
+        list_windows,
+        set_window_bounds,
+        set_window_url,
+        snapshot_tabs,
+    )
+elif CHROME_BACKEND != "applescript":
+    raise ValueError(f"Unknown CHROME_BACKEND {CHROME_BACKEND!r}")
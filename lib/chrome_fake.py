@@ -0,0 +1,132 @@
+"""In-memory Chrome window primitives for running without Chrome (e.g. Linux).
+
+Same signatures as the matching functions in lib.chrome; selected with
+CHROME_BACKEND = "fake". Seed windows with add_window() and answer JS calls by
+setting js_handler. Each fake window has a single tab, whose ID is the
+window's ID; an extension page is a window whose URL contains the extension ID.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from lib.applescript import AppleScriptError
+
+
+@dataclass
+class FakeWindow:
+    window_id: int
+    bounds: tuple[int, int, int, int]
+    url: str = "about:blank"
+    title: str = ""
+    minimized: bool = False
+
+
+# Where Chrome puts a window created without bounds
+_DEFAULT_BOUNDS = (0, 25, 1200, 825)
+
+
+windows: list[FakeWindow] = []  # front to back
+js_handler: Callable[[FakeWindow, str], str | None] = lambda window, js: None
+
+
+def reset() -> None:
+    """Drop all windows and the JS handler."""
+    global js_handler
+    windows.clear()
+    js_handler = lambda window, js: None
+
+
+def add_window(
+    window_id: int, bounds: tuple[int, int, int, int], url: str = "about:blank", title: str = ""
+) -> FakeWindow:
+    """Add a window behind the existing ones."""
+    window = FakeWindow(window_id, bounds, url, title)
+    windows.append(window)
+    return window
+
+
+def _window(window_id: int) -> FakeWindow:
+    for window in windows:
+        if window.window_id == window_id:
+            return window
+    raise AppleScriptError(f"Chrome window {window_id} not found")
+
+
+def snapshot_tabs() -> list["Tab"]:
+    """Return the single tab of every window, front to back."""
+    from lib.chrome import Tab  # lib.chrome imports this module at its end
+
+    return [Tab(window.window_id, window.window_id, window.url, window.title) for window in windows]
+
+
+def close_tabs(tabs: list["Tab"]) -> None:
+    """Close the given tabs, i.e. their windows. Tabs already gone are skipped."""
+    closing = {tab.window_id for tab in tabs}
+    windows[:] = [window for window in windows if window.window_id not in closing]
+
+
+def create_windows(specs: list["WindowSpec"]) -> list[int]:
+    """Create a window per spec, each in front of the previous ones. Returns IDs in spec order."""
+    window_ids = []
+    for spec in specs:
+        window_id = max((window.window_id for window in windows), default=0) + 1
+        windows.insert(0, FakeWindow(
+            window_id, tuple(spec.bounds or _DEFAULT_BOUNDS), spec.url, minimized=spec.minimized
+        ))
+        window_ids.append(window_id)
+    return window_ids
+
+
+def list_windows() -> list[tuple[int, tuple[int, int, int, int]]]:
+    """Return (window ID, bounds) for every window, front to back."""
+    return [(window.window_id, window.bounds) for window in windows]
+
+
+def get_window_bounds(window_id: int) -> tuple[int, int, int, int]:
+    """Return a window's bounds as (left, top, right, bottom)."""
+    return _window(window_id).bounds
+
+
+def set_window_bounds(window_id: int, bounds: tuple[int, int, int, int]) -> None:
+    """Set a window's bounds as (left, top, right, bottom)."""
+    _window(window_id).bounds = tuple(bounds)
+
+
+def set_window_url(window_id: int, url: str) -> None:
+    """Navigate a window's tab to a URL."""
+    _window(window_id).url = url
+
+
+def focus_window(window_id: int) -> None:
+    """Move a window to the front."""
+    window = _window(window_id)
+    windows.remove(window)
+    windows.insert(0, window)
+    window.minimized = False
+
+
+def is_running() -> bool:
+    """The fake Chrome is always running."""
+    return True
+
+
+def exit_tile_fullscreen() -> None:
+    """Fake windows are never tiled."""
+
+
+def exec_js_on_window(window_id: int, js: str) -> str | None:
+    """Answer a JS call through js_handler."""
+    return js_handler(_window(window_id), js)
+
+
+def exec_js_on_extension(extension_id: str, js: str) -> str | None:
+    """Answer a JS call on the first window showing the extension through js_handler."""
+    for window in windows:
+        if extension_id in window.url:
+            return js_handler(window, js)
+    raise AppleScriptError(f"Extension tab {extension_id} not found in Chrome")
+
+
+def close_window(window_id: int) -> None:
+    """Close a window by ID. Does nothing if the window is gone."""
+    windows[:] = [window for window in windows if window.window_id != window_id]
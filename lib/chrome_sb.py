@@ -0,0 +1,189 @@
+"""Chrome window primitives via ScriptingBridge — direct Apple Events, no AppleScript.
+
+Same signatures as the matching functions in lib.chrome; selected with
+CHROME_BACKEND = "scriptingbridge". Each call sends one Apple Event instead of
+compiling and interpreting a script. Requires pyobjc-framework-ScriptingBridge.
+
+Every function sends its events through applescript.call(), so they queue on
+the main-thread executor, show up in executor_stats() and bench counts, stop
+when the run is cancelled, and are recorded and replayed like scripts.
+"""
+
+try:
+    import Foundation
+except ImportError:  # not macOS: only trace replay works
+    Foundation = None
+
+from lib import applescript
+from lib.applescript import AppleScriptError
+
+_CHROME_BUNDLE_ID = "com.google.Chrome"
+_chrome = None  # lazily created SBApplication
+
+
+def _app():
+    """Return the cached SBApplication for Chrome."""
+    global _chrome
+    if _chrome is None:
+        try:
+            from ScriptingBridge import SBApplication
+        except ImportError as e:
+            raise AppleScriptError(
+                "CHROME_BACKEND 'scriptingbridge' needs pyobjc-framework-ScriptingBridge"
+            ) from e
+        _chrome = SBApplication.applicationWithBundleIdentifier_(_CHROME_BUNDLE_ID)
+        if _chrome is None:
+            raise AppleScriptError("Google Chrome not found", error_number=-600)
+    return _chrome
+
+
+def _call(op: str, live, **args) -> object:
+    """Run live() on the AppleScript executor, traced as op with args."""
+    return applescript.call({"scriptingbridge": op, **args}, live, f"{__name__}.{op}")
+
+
+def _window(window_id: int):
+    """Resolve a window by ID, raising like the AppleScript backend when it's gone."""
+    window = _app().windows().objectWithID_(window_id).get()
+    if window is None:
+        raise AppleScriptError(f"Chrome window {window_id} not found")
+    return window
+
+
+def _to_bounds(rect) -> tuple[int, int, int, int]:
+    """NSRect (origin + size) -> AppleScript-style (left, top, right, bottom)."""
+    x, y = int(rect.origin.x), int(rect.origin.y)
+    return (x, y, x + int(rect.size.width), y + int(rect.size.height))
+
+
+def _to_rect(bounds: tuple[int, int, int, int]):
+    x1, y1, x2, y2 = bounds
+    return Foundation.NSMakeRect(x1, y1, x2 - x1, y2 - y1)
+
+
+def snapshot_tabs() -> list["Tab"]:
+    """Return every tab of every Chrome window, three property reads per window."""
+    from lib.chrome import Tab  # lib.chrome imports this module at its end
+
+    def live():
+        rows = []
+        for window in _app().windows():
+            window_id = int(window.id())
+            window_tabs = window.tabs()
+            for tab_id, url, title in zip(
+                window_tabs.arrayByApplyingSelector_("id"),
+                window_tabs.arrayByApplyingSelector_("URL"),
+                window_tabs.arrayByApplyingSelector_("title"),
+            ):
+                rows.append([window_id, int(tab_id), str(url), str(title)])
+        return rows
+
+    return [Tab(*row) for row in _call("snapshot_tabs", live)]
+
+
+def close_tabs(tabs: list["Tab"]) -> None:
+    """Close the given tabs. Tabs already gone are skipped."""
+    def live():
+        windows = _app().windows()
+        for tab in tabs:
+            window = windows.objectWithID_(tab.window_id).get()
+            target = None if window is None else window.tabs().objectWithID_(tab.tab_id).get()
+            if target is not None:
+                target.close()
+
+    _call("close_tabs", live, tabs=[[tab.window_id, tab.tab_id] for tab in tabs])
+
+
+def create_windows(specs: list["WindowSpec"]) -> list[int]:
+    """Create Chrome windows without activating Chrome. Returns IDs in spec order."""
+    def live():
+        app = _app()
+        window_class = app.classForScriptingClass_("window")
+        window_ids = []
+        for spec in specs:
+            window = window_class.alloc().init()
+            app.windows().addObject_(window)
+            if spec.bounds is not None:
+                window.setBounds_(_to_rect(spec.bounds))
+            window.activeTab().setURL_(spec.url)
+            if spec.minimized:
+                window.setMinimized_(True)
+            window_ids.append(int(window.id()))
+        return window_ids
+
+    requested = [[spec.url, spec.bounds and list(spec.bounds), spec.minimized] for spec in specs]
+    return _call("create_windows", live, specs=requested)
+
+
+def list_windows() -> list[tuple[int, tuple[int, int, int, int]]]:
+    """Return (window ID, bounds) for every Chrome window, front to back."""
+    def live():
+        windows = _app().windows()
+        ids = windows.arrayByApplyingSelector_("id")
+        rects = windows.arrayByApplyingSelector_("bounds")
+        return [[int(window_id), _to_bounds(rect)] for window_id, rect in zip(ids, rects)]
+
+    return [(window_id, tuple(bounds)) for window_id, bounds in _call("list_windows", live)]
+
+
+def get_window_bounds(window_id: int) -> tuple[int, int, int, int]:
+    """Return a Chrome window's bounds as (left, top, right, bottom)."""
+    bounds = _call("get_window_bounds", lambda: _to_bounds(_window(window_id).bounds()), window_id=window_id)
+    return tuple(bounds)
+
+
+def set_window_bounds(window_id: int, bounds: tuple[int, int, int, int]) -> None:
+    """Set a Chrome window's bounds as (left, top, right, bottom)."""
+    _call(
+        "set_window_bounds",
+        lambda: _window(window_id).setBounds_(_to_rect(bounds)),
+        window_id=window_id,
+        bounds=list(bounds),
+    )
+
+
+def set_window_url(window_id: int, url: str) -> None:
+    """Navigate the active tab of a Chrome window to a URL."""
+    _call("set_window_url", lambda: _window(window_id).activeTab().setURL_(url), window_id=window_id, url=url)
+
+
+def focus_window(window_id: int) -> None:
+    """Bring a Chrome window to front by ID."""
+    def live():
+        _window(window_id).setIndex_(1)
+        _app().activate()
+
+    _call("focus_window", live, window_id=window_id)
+
+
+def exec_js_on_window(window_id: int, js: str) -> str | None:
+    """Execute JavaScript on the active tab of a Chrome window by ID."""
+    def live():
+        result = _window(window_id).activeTab().executeJavascript_(js)
+        return None if result is None else str(result)
+
+    return _call("exec_js_on_window", live, window_id=window_id, js=js)
+
+
+def exec_js_on_extension(extension_id: str, js: str) -> str | None:
+    """Execute JavaScript on a Chrome tab whose URL contains the given extension ID."""
+    def live():
+        for window in _app().windows():
+            tabs = window.tabs()
+            for tab, url in zip(tabs, tabs.arrayByApplyingSelector_("URL")):
+                if extension_id in str(url):
+                    result = tab.executeJavascript_(js)
+                    return None if result is None else str(result)
+        raise AppleScriptError(f"Extension tab {extension_id} not found in Chrome")
+
+    return _call("exec_js_on_extension", live, extension_id=extension_id, js=js)
+
+
+def close_window(window_id: int) -> None:
+    """Close a Chrome window by ID. Does nothing if the window is gone."""
+    def live():
+        window = _app().windows().objectWithID_(window_id).get()
+        if window is not None:
+            window.close()
+
+    _call("close_window", live, window_id=window_id)
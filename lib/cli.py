@@ -1,18 +1,46 @@
 """CLI entry point for the gigaku command."""
 
+import os
 import signal
 import sys
+import threading
 import time
+from concurrent.futures import Future
+from contextlib import nullcontext
 
+from lib import bench, context, page_runtime
+from lib.applescript import serve
 from lib.chrome import (
     BookmarkError,
+    close_window,
     dismiss_chrome_dialogs,
+    exec_js_on_window,
     focus_window,
     get_ci_bookmark_url,
+    set_window_url,
     validate_ci_bookmarks,
 )
-from lib.config import LANG_MAP, POLL_INTERVAL, TV_MAC_SOURCE
-from lib.tv import get_current_source, switch_to_hdmi1
+from lib.config import (
+    LANG_MAP,
+    PROFILE_DIR,
+    SETUP_BUDGET,
+    TEARDOWN_BUDGET,
+    TV_MAC_SOURCE,
+)
+from lib.display import find_samsung_display
+from lib.history import new_run_id, print_trends, record_step
+from lib.plan import print_plan
+from lib.profiler import SamplingProfiler
+from lib.session import Session, clear_session, load_session, save_session
+from lib.tv import (
+    get_current_source,
+    is_reachable,
+    start_monitor,
+    stop_monitor,
+    switch_to_hdmi1,
+    wait_for_source,
+)
+from lib.watchdog import CachedProbe, Check, Watchdog
 from steps import (
     step_close_netflix_tabs,
     step_close_samsung_windows,
@@ -25,6 +53,7 @@ from steps import (
     step_open_migaku,
     step_pause_media,
     step_pin_toolbar,
+    step_prefetch,
     step_switch_input,
     step_switch_language,
     step_vpn,
@@ -32,20 +61,227 @@ from steps import (
 )
 
 
-def _step(fn, *args, **kwargs):
+# Current run for the history database: (run ID, LANG_MAP key), None when not recording
+_run: tuple[str, str] | None = None
+
+# Sampling profiler for `gigaku --profile <lang>`, None when not profiling
+_profiler: SamplingProfiler | None = None
+
+
+def _step_name(fn) -> str:
+    """History label for a step: its step module name, or the function name."""
+    module = fn.__module__.rsplit(".", 1)[-1]
+    return module if module.startswith("step_") else fn.__name__
+
+
+def _timed(fn, *args, label: str | None = None, **kwargs):
+    """Run a step function and record how long it took in the run history."""
+    label = label or _step_name(fn)
+    start = time.monotonic()
+    ok = False
+    try:
+        with _profiler.step(label) if _profiler is not None else nullcontext():
+            result = fn(*args, **kwargs)
+        ok = True
+        return result
+    finally:
+        if _run is not None:
+            record_step(*_run, label, time.monotonic() - start, ok)
+
+
+def _record_when_done(future: Future, label: str) -> None:
+    """Record a background step in the run history once its future finishes."""
+    run, start = _run, time.monotonic()
+    if run is not None:
+        future.add_done_callback(
+            lambda done: record_step(*run, label, time.monotonic() - start, done.exception() is None)
+        )
+
+
+def _finish_profile() -> None:
+    """Stop the profiler, write per-step collapsed stacks and print the time split."""
+    global _profiler
+    if _profiler is None:
+        return
+    _profiler.stop()
+    directory = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{_run[0]}")
+    _profiler.write(directory)
+    print(f"\nProfile (collapsed stacks in {os.path.relpath(directory)}):")
+    _profiler.print_summary()
+    _profiler = None
+
+
+def _step(fn, *args, label: str | None = None, **kwargs):
     """Dismiss Chrome dialogs then run a step function."""
     dismiss_chrome_dialogs()
-    return fn(*args, **kwargs)
+    return _timed(fn, *args, label=label, **kwargs)
+
+
+def _interrupt(signum, frame) -> None:
+    """SIGINT: cancel the run context; the run unwinds from its next wait or check.
+
+    The main thread is the AppleScript executor, so the run itself is not
+    interrupted. Ctrl+C on an already cancelled context exits at once.
+    """
+    if context.current().cancelled:
+        raise KeyboardInterrupt
+    context.current().cancel("interrupted")
+
+
+def _watchdog(samsung, ci_window_id: int, vpn_country: str | None) -> Watchdog:
+    """Checks for the set-up state, each re-applying only its own step."""
+
+    def restore_input() -> None:
+        _step(step_switch_input.run)
+        _timed(wait_for_source, TV_MAC_SOURCE, 15)
+
+    tv_source = CachedProbe(get_current_source)
+
+    def on_mac_input() -> bool | None:
+        # TV off or not answering: nothing to restore
+        source = tv_source() if is_reachable() else None
+        return None if source is None else source == TV_MAC_SOURCE
+
+    ci = CachedProbe(lambda: page_runtime.call(
+        lambda js: exec_js_on_window(ci_window_id, js), "ciState"
+    ))
+
+    def video_fullscreen() -> bool | None:
+        state = ci()
+        if state is None or "netflix" not in state["host"]:
+            return None
+        return state["fullscreen"]
+
+    def toolbar_pinned() -> bool | None:
+        state = ci()
+        if state is None or state["toolbar"] not in ("pinned", "unpinned"):
+            return None
+        return state["toolbar"] == "pinned"
+
+    checks = [
+        Check(f"TV input ({TV_MAC_SOURCE})", on_mac_input, restore_input),
+        Check("CI video fullscreen", video_fullscreen,
+              lambda: _step(step_fullscreen_ci_video.run, ci_window_id)),
+        Check("Migaku toolbar", toolbar_pinned, lambda: _step(step_pin_toolbar.run, ci_window_id)),
+    ]
+    if vpn_country is not None:
+        vpn = CachedProbe(step_vpn.peek_state)
+        checks.append(Check(
+            f"VPN ({vpn_country})",
+            lambda: None if vpn() is None else vpn_country in vpn(),
+            lambda: _step(step_vpn.run, samsung, country=vpn_country),
+        ))
+    return Watchdog(checks)
+
+
+def _usage() -> None:
+    valid = ", ".join(LANG_MAP)
+    print(f"Usage: gigaku [--profile] [--watch] <{valid}>")
+    print(f"       gigaku switch <{valid}>")
+    print(f"       gigaku plan <{valid}>")
+    print("       gigaku history")
+    print("       gigaku bench <step> [args...] [--repeat N] [--warmup M] [--save]")
+    raise SystemExit(1)
+
+
+def switch(lang: str) -> None:
+    """Switch the running session to another language in place.
+
+    Only what differs between the two LANG_MAP entries is redone: VPN country,
+    CI bookmark (navigated in the existing CI window) and Migaku language.
+    TV input, window layout and window fullscreen state are left alone.
+    """
+    session = load_session()
+    if session is None:
+        print("No running gigaku session — start one with gigaku <lang>")
+        raise SystemExit(1)
+    if session.lang == lang:
+        print(f"Session already on {lang}")
+        return
+
+    old_language, old_subfolder, old_vpn_country = LANG_MAP[session.lang]
+    language, subfolder, vpn_country = LANG_MAP[lang]
+
+    try:
+        url = get_ci_bookmark_url(subfolder)
+    except BookmarkError as e:
+        print(f"Bookmark error: {e}")
+        raise SystemExit(1)
+
+    samsung = find_samsung_display()
+    if samsung is None:
+        print("Samsung display not found")
+        raise SystemExit(1)
+
+    print(f"Switching session {session.lang} -> {lang}...")
+    context.start(SETUP_BUDGET, "switch")
+    try:
+        if vpn_country != old_vpn_country:
+            _step(step_vpn.run, samsung, country=vpn_country)
+        if subfolder != old_subfolder:
+            _step(set_window_url, session.ci_window_id, url)
+            _step(step_pause_media.run, ci_window_id=session.ci_window_id)
+        if language != old_language:
+            _step(step_switch_language.run, language=language)
+        _step(focus_window, session.ci_window_id)
+        if subfolder != old_subfolder:
+            _step(step_pin_toolbar.run, session.ci_window_id)
+            _step(step_fullscreen_ci_video.run, session.ci_window_id)
+    except context.Cancelled as e:
+        print(f"Switch cancelled: {e}")
+        raise SystemExit(1)
+
+    session.lang = lang
+    save_session(session)
+    print(f"Switched to {lang}")
 
 
 def main():
+    signal.signal(signal.SIGINT, _interrupt)
+    try:
+        # NSAppleScript is main-thread only: the main thread runs the scripts, _main a worker
+        serve(_main)
+    except context.Cancelled as e:
+        print(f"\nCancelled: {e}")
+        raise SystemExit(1)
+
+
+def _main():
+    global _run, _profiler
+
+    flags = set()
+    while sys.argv[1:2] and sys.argv[1] in ("--profile", "--watch"):
+        flags.add(sys.argv.pop(1))
+    profile = "--profile" in flags
+
+    if sys.argv[1:] == ["history"]:
+        print_trends()
+        return
+
+    if sys.argv[1:2] == ["bench"]:
+        bench.main(sys.argv[2:])
+        return
+
+    if len(sys.argv) == 3 and sys.argv[1] in ("switch", "plan"):
+        if sys.argv[2] not in LANG_MAP:
+            _usage()
+        if sys.argv[1] == "plan":
+            print_plan(sys.argv[2])
+        else:
+            switch(sys.argv[2])
+        return
+
     # Parse language arg
     if len(sys.argv) != 2 or sys.argv[1] not in LANG_MAP:
-        valid = ", ".join(LANG_MAP)
-        print(f"Usage: gigaku <{valid}>")
-        raise SystemExit(1)
+        _usage()
 
     language, subfolder, vpn_country = LANG_MAP[sys.argv[1]]
+    _run = (new_run_id(), sys.argv[1])
+    # Every wait, retry and TV call below gives up once this runs out or Ctrl+C cancels it
+    context.start(SETUP_BUDGET, "setup")
+    if profile:
+        _profiler = SamplingProfiler(thread_id=threading.get_ident())
+        _profiler.start()
 
     # Validate early — fail before any steps if CI bookmarks are misconfigured
     try:
@@ -55,45 +291,77 @@ def main():
         print(f"Bookmark error: {e}")
         raise SystemExit(1)
 
-    samsung = step_wait_samsung.run()
-    step_dim_display.run()  # no Chrome interaction, no dismiss needed
-    step_enable_bluetooth.run()  # no Chrome interaction, no dismiss needed
+    # Out of process and independent of everything else; reports when done
+    _record_when_done(step_enable_bluetooth.start(), "step_enable_bluetooth")
+
+    # Close stale Netflix tabs first so the preloaded CI tab survives
+    _step(step_close_netflix_tabs.run)
+    # Preload windows in the background while the TV, input switch and VPN settle.
+    # The CI page waits for the VPN when one is needed (region-locked catalogs).
+    ci_window_id, migaku_window_id = _step(
+        step_prefetch.run, subfolder, preload_ci=vpn_country is None
+    )
+
+    samsung = None
     try:
-        _step(step_close_netflix_tabs.run)
+        samsung = _timed(step_wait_samsung.run)
+        start_monitor()  # serves the source reads below from one background poller
+        _timed(step_dim_display.run)  # no Chrome interaction, no dismiss needed
         _step(step_pause_media.run)
         _step(step_switch_input.run)
         print("Waiting for TV input to switch...")
-        while get_current_source() != TV_MAC_SOURCE:
-            time.sleep(POLL_INTERVAL)
+        _timed(wait_for_source, TV_MAC_SOURCE)
+        stop_monitor()  # nothing below reads the source; don't poll the TV all session
         _step(step_focus_samsung.run, samsung)
-        _step(step_close_samsung_windows.run, samsung)
+        _step(step_close_samsung_windows.run, samsung, keep=[ci_window_id, migaku_window_id])
         _step(step_vpn.run, samsung, country=vpn_country)
-        ci_window_id = _step(step_open_ci.run, samsung, subfolder=subfolder)
-        _step(step_pause_media.run, ci_window_id=ci_window_id)
-        migaku_window_id = _step(step_open_migaku.run, samsung)
+        ci_window_id = _step(step_open_ci.run, samsung, subfolder=subfolder, window_id=ci_window_id)
+        _step(step_pause_media.run, ci_window_id=ci_window_id, label="step_pause_media_ci")
+        migaku_window_id = _step(step_open_migaku.run, samsung, window_id=migaku_window_id)
         _step(step_switch_language.run, language=language)
         _step(step_fullscreen_migaku.run, migaku_window_id)
         _step(focus_window, ci_window_id)
         _step(step_pin_toolbar.run, ci_window_id)
         _step(step_fullscreen_ci_video.run, ci_window_id)
+        save_session(Session(sys.argv[1], ci_window_id, migaku_window_id))
+        context.start(name="session")  # the setup budget doesn't cover the session itself
+        _finish_profile()
 
-        print("\nSetup complete. Press Ctrl+C to clean up and exit.")
-        while True:
-            signal.pause()
-    except KeyboardInterrupt:
+        if "--watch" in flags:
+            print("\nSetup complete. Watching for drift; press Ctrl+C to clean up and exit.")
+            _watchdog(samsung, ci_window_id, vpn_country).run()
+        else:
+            print("\nSetup complete. Press Ctrl+C to clean up and exit.")
+            context.current().wait()
+    except (KeyboardInterrupt, context.Cancelled) as e:
+        if isinstance(e, context.Cancelled) and str(e) != "interrupted":
+            print(f"\nSetup cancelled: {e}")
+        _finish_profile()
+        stop_monitor()
         print("\nCleaning up...")
+        # Bounded: a stuck cleanup step gives up instead of hanging the exit
+        context.start(TEARDOWN_BUDGET, "teardown")
+        clear_session()
+
+        if samsung is not None:
+            try:
+                step_vpn.run(samsung, country=None)
+            except (Exception, context.Cancelled) as e:
+                print(f"  VPN disconnect failed: {e}")
 
-        try:
-            step_vpn.run(samsung, country=None)
-        except Exception as e:
-            print(f"  VPN disconnect failed: {e}")
+            try:
+                step_close_samsung_windows.run(samsung)
+            except (Exception, context.Cancelled) as e:
+                print(f"  Close windows failed: {e}")
 
-        try:
-            step_close_samsung_windows.run(samsung)
-        except Exception as e:
-            print(f"  Close windows failed: {e}")
+            try:
+                switch_to_hdmi1()
+            except (Exception, context.Cancelled) as e:
+                print(f"  TV switch failed: {e}")
 
-        try:
-            switch_to_hdmi1()
-        except Exception as e:
-            print(f"  TV switch failed: {e}")
+        # Preloaded windows that never made it onto the Samsung display
+        for window_id in (ci_window_id, migaku_window_id):
+            try:
+                close_window(window_id)
+            except (Exception, context.Cancelled) as e:
+                print(f"  Close window {window_id} failed: {e}")
@@ -10,6 +10,11 @@ CHROME_USER_DATA = os.path.expanduser("~/Library/Application Support/Google/Chro
 CHROME_PROFILE = "Profile 1"
 CHROME_BOOKMARKS_PATH = os.path.join(CHROME_USER_DATA, CHROME_PROFILE, "Bookmarks")
 
+# Chrome window/tab primitives backend: "applescript" (default), "scriptingbridge"
+# (direct Apple Events, needs pyobjc-framework-ScriptingBridge) or "fake"
+# (in-memory, for tests). System Events UI scripting always uses AppleScript.
+CHROME_BACKEND = os.environ.get("GIGAKU_CHROME_BACKEND", "applescript")
+
 # Migaku extension
 MIGAKU_EXTENSION_ID = "dmeppfcidcpcocleneopiblmpnbokhep"
 MIGAKU_APP_URL = (
@@ -29,8 +34,30 @@ LANG_MAP = {
     "jap": ("Japanese", "jap", "Japan"),
 }
 
+# Live session record written by `gigaku <lang>`, read by `gigaku switch <lang>`
+SESSION_PATH = os.path.join(os.path.dirname(__file__), "..", ".gigaku_session")
+
+# Facts remembered across runs (Migaku language, VPN country, ...), see lib/state.py
+STATE_PATH = os.path.join(os.path.dirname(__file__), "..", ".gigaku_state.json")
+
+# Step timing history (SQLite), used by `gigaku plan`
+HISTORY_PATH = os.path.join(os.path.dirname(__file__), "..", ".gigaku_history.sqlite")
+
+# `gigaku --profile <lang>` writes per-step collapsed stacks under here
+PROFILE_DIR = os.path.join(os.path.dirname(__file__), "..", "profiles")
+
+# `gigaku bench` baselines, keyed by step and arguments
+BENCH_BASELINE_PATH = os.path.join(os.path.dirname(__file__), "..", ".gigaku_bench.json")
+
+# Record/replay of AppleScript and TV traffic (see lib/trace.py)
+TRACE_RECORD_PATH = os.environ.get("GIGAKU_RECORD")
+TRACE_REPLAY_PATH = os.environ.get("GIGAKU_REPLAY")
+TRACE_REPLAY_SPEED = float(os.environ.get("GIGAKU_REPLAY_SPEED", "1"))
+
 # Timing
 POLL_INTERVAL = 1  # seconds between Samsung display polls
+SETUP_BUDGET = 300  # seconds a setup or switch may take before it is cancelled
+TEARDOWN_BUDGET = 30  # seconds cleanup may take after Ctrl+C or a cancelled setup
 
 # Available Migaku languages
 AVAILABLE_LANGUAGES = [
@@ -46,3 +73,13 @@ TV_TOKEN_PATH = os.path.join(os.path.dirname(__file__), "..", ".tv_token")
 TV_UPNP_PORT = 7676
 TV_MAC_SOURCE = "HDMI2"
 TV_MAC_SOURCE_ID = 58  # from GetSourceList — 0=TV, 57=HDMI1, 58=HDMI2, 59=HDMI3, etc.
+TV_MAC_SOURCE_KEY = "KEY_HDMI2"  # remote key for the same input (WebSocket path)
+TV_PROBE_TIMEOUT = 0.3  # seconds for the TCP reachability probe
+TV_HEALTH_TTL = 5  # seconds a reachability result is reused
+TV_MONITOR_INTERVAL = 1  # seconds between background source monitor readings
+TV_MONITOR_MAX_AGE = 2  # seconds a monitor reading may be served from cache
+TV_SWITCH_HEAD_START = 1.5  # seconds SOAP gets before the WebSocket path joins the race
+
+# `gigaku --watch <lang>` supervisor (see lib/watchdog.py)
+WATCHDOG_INTERVAL = 30  # seconds between probes of the TV input, Chrome and VPN
+WATCHDOG_COOLDOWN = 600  # drifting again within this many seconds of a fix counts as deliberate
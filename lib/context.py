@@ -0,0 +1,114 @@
+"""Run context: one deadline and cancellation token for a whole gigaku run.
+
+The CLI starts a context with a time budget for setup, and another for
+teardown. Waits, retries and network calls consult the current context
+instead of only their own timeouts:
+
+- context.sleep() returns early and raises Cancelled once the run is
+  cancelled (Ctrl+C) or out of time.
+- timeout() and clip() cap a per-call timeout or deadline by what is left
+  of the run.
+- check() raises Cancelled between steps of a longer operation.
+
+Outside the CLI the current context has no budget and is never cancelled,
+so standalone steps behave as before.
+"""
+
+import threading
+import time
+
+
+class Cancelled(BaseException):
+    """Raised when the run was cancelled or its budget ran out.
+
+    A BaseException (like KeyboardInterrupt and asyncio.CancelledError), so
+    the `except Exception` wrappers in steps let it through to the CLI's
+    teardown instead of turning it into a step error.
+    """
+
+
+class RunContext:
+    """Deadline (time.monotonic()) and cancellation flag shared by every thread of a run."""
+
+    def __init__(self, budget: float | None = None, name: str = "run"):
+        self.name = name
+        self.deadline = None if budget is None else time.monotonic() + budget
+        self.reason: str | None = None
+        self._event = threading.Event()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """Cancel the run. Sleeping waits wake up and raise Cancelled."""
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if not self._event.is_set() and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel(f"{self.name} budget exceeded")
+        return self._event.is_set()
+
+    @property
+    def expired(self) -> bool:
+        """Whether the budget ran out (as opposed to an explicit cancel)."""
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def remaining(self) -> float | None:
+        """Seconds until the deadline, or None without one."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self) -> None:
+        """Raise Cancelled if the run was cancelled or is out of time."""
+        if self.cancelled:
+            raise Cancelled(self.reason)
+
+    def timeout(self, seconds: float) -> float:
+        """seconds capped by the time left. Raises Cancelled if none is left."""
+        self.check()
+        remaining = self.remaining()
+        return seconds if remaining is None else min(seconds, remaining)
+
+    def clip(self, deadline: float | None) -> float | None:
+        """The earlier of deadline and the run's deadline (None means unbounded)."""
+        if deadline is None:
+            return self.deadline
+        if self.deadline is None:
+            return deadline
+        return min(deadline, self.deadline)
+
+    def wait(self) -> None:
+        """Block until the run is cancelled, then raise Cancelled."""
+        while not self._event.wait(self.remaining()):
+            self.check()
+        self.check()
+
+    def sleep(self, seconds: float) -> None:
+        """Sleep, waking as soon as the run is cancelled. Raises Cancelled then."""
+        self._event.wait(self.timeout(seconds))
+        self.check()
+
+
+_current = RunContext()
+
+
+def current() -> RunContext:
+    return _current
+
+
+def start(budget: float | None = None, name: str = "run") -> RunContext:
+    """Make a new context current. Earlier contexts stay cancelled if they were."""
+    global _current
+    _current = RunContext(budget, name)
+    return _current
+
+
+def sleep(seconds: float) -> None:
+    """Sleep in the current context (see RunContext.sleep)."""
+    _current.sleep(seconds)
+
+
+def check() -> None:
+    """Raise Cancelled if the current run was cancelled or is out of time."""
+    _current.check()
@@ -2,12 +2,16 @@
 
 from dataclasses import dataclass
 
-from Quartz.CoreGraphics import (
-    CGDisplayBounds,
-    CGDisplayIsBuiltin,
-    CGDisplayVendorNumber,
-    CGGetActiveDisplayList,
-)
+try:
+    from Quartz.CoreGraphics import (
+        CGDisplayBounds,
+        CGDisplayIsActive,
+        CGDisplayIsBuiltin,
+        CGDisplayVendorNumber,
+        CGGetActiveDisplayList,
+    )
+except ImportError:  # not macOS: DisplayInfo still works with the fake Chrome backend
+    pass
 
 from lib.config import SAMSUNG_VENDOR_IDS
 
@@ -27,24 +31,32 @@ class DisplayInfo:
         return (self.x + self.width / 2, self.y + self.height / 2)
 
 
+def _display_info(did: int) -> DisplayInfo:
+    bounds = CGDisplayBounds(did)
+    return DisplayInfo(
+        display_id=did,
+        x=int(bounds.origin.x),
+        y=int(bounds.origin.y),
+        width=int(bounds.size.width),
+        height=int(bounds.size.height),
+        vendor=CGDisplayVendorNumber(did),
+        builtin=bool(CGDisplayIsBuiltin(did)),
+    )
+
+
 def list_displays() -> list[DisplayInfo]:
     """Return info for all active displays."""
     err, display_ids, count = CGGetActiveDisplayList(16, None, None)
     if err != 0:
         return []
-    displays = []
-    for did in display_ids[:count]:
-        bounds = CGDisplayBounds(did)
-        displays.append(DisplayInfo(
-            display_id=did,
-            x=int(bounds.origin.x),
-            y=int(bounds.origin.y),
-            width=int(bounds.size.width),
-            height=int(bounds.size.height),
-            vendor=CGDisplayVendorNumber(did),
-            builtin=bool(CGDisplayIsBuiltin(did)),
-        ))
-    return displays
+    return [_display_info(did) for did in display_ids[:count]]
+
+
+def display_info(display_id: int) -> DisplayInfo | None:
+    """Current info for one display, or None if it isn't active."""
+    if not CGDisplayIsActive(display_id):
+        return None
+    return _display_info(display_id)
 
 
 def find_samsung_display() -> DisplayInfo | None:
@@ -0,0 +1,177 @@
+"""Run history: how long each setup step and wait took, kept in a local SQLite database.
+
+Waits use the history to size themselves: WaitBudget derives a timeout from
+the p99 of past successful waits (plus a margin) and a poll interval from
+their median, falling back to the hard-coded defaults until enough samples
+exist.
+"""
+
+import sqlite3
+import statistics
+import time
+import uuid
+
+from lib import context
+from lib.config import HISTORY_PATH
+
+_SCHEMA = """\
+CREATE TABLE IF NOT EXISTS steps (
+    run_id TEXT NOT NULL,
+    lang TEXT NOT NULL,
+    step TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    ok INTEGER NOT NULL,
+    at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS waits (
+    name TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    ok INTEGER NOT NULL,
+    at REAL NOT NULL
+)"""
+
+_MIN_SAMPLES = 5  # successful waits needed before adapting
+_RECENT = 50  # samples considered per wait
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(HISTORY_PATH)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def record_step(run_id: str, lang: str, step: str, seconds: float, ok: bool) -> None:
+    """Store one step timing. History is best-effort: database errors are ignored."""
+    try:
+        with _connect() as conn:
+            conn.execute(
+                "INSERT INTO steps VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, lang, step, seconds, int(ok), time.time()),
+            )
+    except sqlite3.Error:
+        pass
+
+
+def step_estimates(recent: int = 20) -> dict[str, float]:
+    """Median duration per step over its most recent successful runs."""
+    try:
+        with _connect() as conn:
+            rows = conn.execute(
+                "SELECT step, seconds FROM steps WHERE ok = 1 ORDER BY at DESC"
+            ).fetchall()
+    except sqlite3.Error:
+        return {}
+    samples: dict[str, list[float]] = {}
+    for step, seconds in rows:
+        bucket = samples.setdefault(step, [])
+        if len(bucket) < recent:
+            bucket.append(seconds)
+    return {step: statistics.median(values) for step, values in samples.items()}
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def record_wait(name: str, seconds: float, ok: bool) -> None:
+    """Store how long a wait took. Best-effort like record_step."""
+    try:
+        with _connect() as conn:
+            conn.execute(
+                "INSERT INTO waits VALUES (?, ?, ?, ?)", (name, seconds, int(ok), time.time())
+            )
+    except sqlite3.Error:
+        pass
+
+
+def wait_samples(name: str, recent: int = _RECENT) -> list[float]:
+    """Durations of the most recent successful waits with this name."""
+    try:
+        with _connect() as conn:
+            rows = conn.execute(
+                "SELECT seconds FROM waits WHERE name = ? AND ok = 1 ORDER BY at DESC LIMIT ?",
+                (name, recent),
+            ).fetchall()
+    except sqlite3.Error:
+        return []
+    return [seconds for (seconds,) in rows]
+
+
+class WaitBudget:
+    """Timeout and poll interval for a named wait, adapted from its history.
+
+    timeout: p99 x 1.5 + 1s, between a quarter and twice the default.
+    interval: a tenth of the median, between 0.1s and the default.
+    Iterate polls() and call done() on success; exhausting polls() records a failure.
+    Sleeps go through the run context, so a cancelled run raises Cancelled.
+    """
+
+    def __init__(self, name: str, timeout: float, interval: float):
+        self.name = name
+        samples = wait_samples(name)
+        if len(samples) >= _MIN_SAMPLES:
+            timeout = min(timeout * 2, max(timeout / 4, _percentile(samples, 0.99) * 1.5 + 1))
+            interval = min(interval, max(0.1, statistics.median(samples) / 10))
+        self.timeout = timeout
+        self.interval = interval
+        self._start = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self._start
+
+    def polls(self):
+        """Yield attempt numbers, sleeping interval between them, until the timeout."""
+        attempt = 0
+        while True:
+            context.check()
+            yield attempt
+            attempt += 1
+            if self.elapsed + self.interval > self.timeout:
+                break
+            context.sleep(self.interval)
+        record_wait(self.name, self.elapsed, False)
+
+    def done(self) -> None:
+        """Record a successful wait."""
+        record_wait(self.name, self.elapsed, True)
+
+
+def print_trends() -> None:
+    """Print per-step and per-wait timing statistics for `gigaku history`."""
+    try:
+        with _connect() as conn:
+            steps = conn.execute(
+                "SELECT step, seconds, ok FROM steps ORDER BY at DESC"
+            ).fetchall()
+            waits = conn.execute(
+                "SELECT name, seconds, ok FROM waits ORDER BY at DESC"
+            ).fetchall()
+    except sqlite3.Error as e:
+        print(f"Cannot read history: {e}")
+        return
+
+    for title, rows in (("Steps", steps), ("Waits", waits)):
+        grouped: dict[str, tuple[list[float], int]] = {}
+        for name, seconds, ok in rows:
+            good, failures = grouped.get(name, ([], 0))
+            if ok:
+                good.append(seconds)
+            grouped[name] = (good, failures + (not ok))
+        print(f"{title}:")
+        if not grouped:
+            print("  (no history yet)")
+        print(f"  {'name':<28} {'runs':>5} {'fail':>5} {'last':>7} {'median':>7} {'p95':>7} {'p99':>7}")
+        for name, (good, failures) in sorted(grouped.items()):
+            if good:
+                stats = [good[0], statistics.median(good), _percentile(good, 0.95), _percentile(good, 0.99)]
+                cells = " ".join(f"{value:>6.1f}s" for value in stats)
+            else:
+                cells = " ".join(f"{'-':>7}" for _ in range(4))
+            print(f"  {name:<28} {len(good) + failures:>5} {failures:>5} {cells}")
+        print()
@@ -0,0 +1,90 @@
+"""Out-of-process AppleScript/JXA runner.
+
+Some scripts can't run in-process (IOBluetooth aborts in Python CLI processes
+on macOS Sequoia), so they go through /usr/bin/osascript launched with NSTask.
+Each osascript process runs one script read from stdin.
+
+submit() never blocks: it returns a Future and runs completion callbacks on a
+worker thread.
+"""
+
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+
+try:
+    import Foundation
+except ImportError:  # non-macOS (e.g. replaying a trace)
+    Foundation = None
+
+from lib import trace
+from lib.applescript import AppleScriptError
+
+OSASCRIPT = "/usr/bin/osascript"
+
+_workers = ThreadPoolExecutor(max_workers=4, thread_name_prefix="osascript")
+
+
+def _launch(language: str) -> tuple:
+    """Start an osascript process that waits for its script on stdin."""
+    stdin, stdout, stderr = Foundation.NSPipe.pipe(), Foundation.NSPipe.pipe(), Foundation.NSPipe.pipe()
+    task = Foundation.NSTask.alloc().init()
+    task.setLaunchPath_(OSASCRIPT)
+    task.setArguments_(["-l", language, "-"])
+    task.setStandardInput_(stdin)
+    task.setStandardOutput_(stdout)
+    task.setStandardError_(stderr)
+    task.launch()
+    return task, stdin, stdout, stderr
+
+
+def _read(pipe) -> str:
+    data = pipe.fileHandleForReading().readDataToEndOfFile()
+    return str(Foundation.NSString.alloc().initWithData_encoding_(data, 4) or "")  # UTF-8
+
+
+def _execute(source: str, language: str) -> str:
+    if Foundation is None:
+        raise AppleScriptError("osascript requires macOS (pyobjc Foundation)")
+    task, stdin, stdout, stderr = _launch(language)
+    data = Foundation.NSString.stringWithString_(source).dataUsingEncoding_(4)
+    writer = stdin.fileHandleForWriting()
+    writer.writeData_(data)
+    writer.closeFile()
+    # Drain stdout before waiting so a large result can't fill the pipe and stall
+    output = _read(stdout)
+    task.waitUntilExit()
+    if task.terminationStatus() != 0:
+        raise AppleScriptError(_read(stderr).strip() or f"osascript exited with {task.terminationStatus()}")
+    return output.strip()
+
+
+def _run(source: str, language: str) -> str:
+    return trace.call(
+        "osascript",
+        {"source": source, "language": language},
+        lambda: _execute(source, language),
+        errors={"AppleScriptError": AppleScriptError},
+    )
+
+
+def submit(
+    source: str,
+    language: str = "AppleScript",
+    callback: Callable[[Future], None] | None = None,
+) -> Future:
+    """Run a script in an osascript process without blocking.
+
+    Args:
+        source: Script text.
+        language: "AppleScript" or "JavaScript" (JXA).
+        callback: Called with the finished Future on a worker thread.
+    """
+    future = _workers.submit(_run, source, language)
+    if callback is not None:
+        future.add_done_callback(callback)
+    return future
+
+
+def run(source: str, language: str = "AppleScript", timeout: float | None = None) -> str:
+    """Run a script in an osascript process and wait for its output."""
+    return submit(source, language).result(timeout)
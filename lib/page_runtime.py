@@ -0,0 +1,131 @@
+"""JavaScript helper runtime installed into Chrome pages as window.__gigaku.
+
+Steps used to send their whole DOM-walking script on every poll. Now the
+helpers are installed once per page (navigation drops them and the next call
+reinstalls), and each poll is a short call like
+`__gigaku.pauseMedia()`. Lookups cache their element while it stays attached.
+Results come back as JSON, so one helper can return several values.
+
+Bump VERSION whenever RUNTIME_JS changes so already installed pages upgrade.
+"""
+
+import json
+from collections.abc import Callable
+
+VERSION = 2
+
+RUNTIME_JS = """\
+(function () {
+  var cache = {};
+  function live(el) { return el && el.isConnected ? el : null; }
+  function cached(key, find) {
+    var el = live(cache[key]);
+    if (!el) { el = find(); if (el) cache[key] = el; }
+    return el || null;
+  }
+  var g = {
+    v: %(version)d,
+    $: function (selector) {
+      return cached('q:' + selector, function () { return document.querySelector(selector); });
+    },
+    testId: function (id) { return g.$('[data-testid="' + id + '"]'); },
+    text: function (selector) { var el = g.$(selector); return el ? el.textContent : null; },
+    click: function (selector) { var el = g.$(selector); if (el) el.click(); return !!el; },
+    media: function () {
+      return cached('media', function () {
+        var m = document.querySelector('video') || document.querySelector('audio');
+        var frames = document.querySelectorAll('iframe');
+        for (var i = 0; !m && i < frames.length; i++) {
+          try {
+            var fd = frames[i].contentDocument;
+            if (fd) m = fd.querySelector('video') || fd.querySelector('audio');
+          } catch (e) {}
+        }
+        return m;
+      });
+    },
+    pauseMedia: function () {
+      var m = g.media();
+      if (!m) return 'no_media';
+      if (m.readyState < 3) return 'loading';
+      m.pause();
+      return 'paused';
+    },
+    shadowButton: function (hostSelector, labelPart) {
+      var host = g.$(hostSelector);
+      if (!host || !host.shadowRoot) return undefined;
+      return cached('shadow:' + hostSelector + ':' + labelPart, function () {
+        var btns = host.shadowRoot.querySelectorAll('button');
+        for (var i = 0; i < btns.length; i++) {
+          if ((btns[i].getAttribute('aria-label') || '').indexOf(labelPart) !== -1) return btns[i];
+        }
+        return null;
+      });
+    },
+    toolbarState: function () {
+      var btn = g.shadowButton('#MigakuShadowDom', 'toolbar');
+      if (btn === undefined) return 'no-shadow';
+      if (!btn) return 'no-button';
+      return btn.getAttribute('aria-label') === 'Pin toolbar' ? 'unpinned' : 'pinned';
+    },
+    pinToolbar: function () {
+      var state = g.toolbarState();
+      if (state === 'pinned') return 'already-pinned';
+      if (state !== 'unpinned') return state;
+      g.shadowButton('#MigakuShadowDom', 'toolbar').click();
+      return 'pinned';
+    },
+    ciState: function () {
+      return {
+        host: window.location.hostname,
+        fullscreen: !!document.fullscreenElement,
+        toolbar: g.toolbarState()
+      };
+    },
+    vpnState: function () {
+      var disconnect = g.testId('connection-card-disconnect-button');
+      var title = g.testId('connection-card-title');
+      return {
+        ready: !!(g.testId('location-card-search-input')
+          || g.testId('connection-card-quick-connect-button') || disconnect),
+        connected: !!disconnect,
+        title: title ? title.textContent : null
+      };
+    },
+    setInput: function (selector, value) {
+      var input = g.$(selector);
+      if (!input) return false;
+      var setter = Object.getOwnPropertyDescriptor(window.HTMLInputElement.prototype, 'value').set;
+      setter.call(input, value);
+      input.dispatchEvent(new Event('input', {bubbles: true}));
+      return true;
+    }
+  };
+  window.__gigaku = g;
+  return g;
+})()""" % {"version": VERSION}
+
+_MISSING = "__gigaku_missing__"
+
+
+def _invocation(runtime: str, fn: str, args: tuple) -> str:
+    call_args = ", ".join(json.dumps(arg) for arg in args)
+    return f"JSON.stringify({{r: {runtime}.{fn}({call_args})}})"
+
+
+def call(execute: Callable[[str], str | None], fn: str, *args) -> object:
+    """Call a window.__gigaku helper through execute (an exec_js function).
+
+    Tries the short call first and only sends the runtime when the page
+    doesn't have this version installed yet. Arguments and the result pass
+    through JSON.
+    """
+    result = execute(
+        f"window.__gigaku && window.__gigaku.v === {VERSION}"
+        f" ? {_invocation('window.__gigaku', fn, args)} : '{_MISSING}'"
+    )
+    if result == _MISSING:
+        result = execute(_invocation(RUNTIME_JS, fn, args))
+    if not result:
+        return None
+    return json.loads(result).get("r")
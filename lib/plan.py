@@ -0,0 +1,123 @@
+"""Dry-run planner for `gigaku plan <lang>`: what setup would do and how long it should take."""
+
+import time
+from dataclasses import dataclass
+
+from lib.chrome import BookmarkError, get_ci_bookmark_url
+from lib.config import LANG_MAP, TV_MAC_SOURCE
+from lib.display import find_samsung_display
+from lib.history import step_estimates
+from lib.session import load_session
+from lib.tv import TVError, get_current_source, is_reachable
+from steps import step_vpn
+
+
+@dataclass
+class PlannedStep:
+    name: str  # same label the CLI records in the run history
+    note: str
+    skip: bool = False
+    background: bool = False  # runs alongside the others, so it adds nothing to the total
+
+
+def _peek_tv_source() -> str | None:
+    """Current TV source if the TV answers quickly, else None."""
+    if not is_reachable():
+        return None
+    try:
+        return get_current_source(deadline=time.monotonic() + 2)
+    except (TVError, OSError):
+        return None
+
+
+def build_plan(lang: str) -> list[PlannedStep]:
+    """Inspect cheap current state and list the setup steps for lang in order."""
+    language, subfolder, vpn_country = LANG_MAP[lang]
+    samsung = find_samsung_display()
+    source = _peek_tv_source()
+    vpn = step_vpn.peek_state()
+    try:
+        bookmark = get_ci_bookmark_url(subfolder)
+    except BookmarkError as e:
+        bookmark = f"BOOKMARK ERROR: {e}"
+
+    on_mac = source == TV_MAC_SOURCE
+    plan = [
+        PlannedStep("step_enable_bluetooth", "enable Bluetooth if off (in the background)", background=True),
+        PlannedStep("step_close_netflix_tabs", "close leftover Netflix tabs"),
+        PlannedStep(
+            "step_prefetch",
+            "preload Migaku and CI" if vpn_country is None else "preload Migaku, blank CI (loads after VPN)",
+        ),
+        PlannedStep(
+            "step_wait_samsung",
+            f"display connected ({samsung.width}x{samsung.height})" if samsung else "wait for TV display",
+            skip=samsung is not None,
+        ),
+        PlannedStep("step_dim_display", "built-in brightness -> 0"),
+    ]
+
+    if source is None:
+        plan.append(PlannedStep("step_pause_media", "TV unreachable", skip=True))
+    elif on_mac:
+        plan.append(PlannedStep("step_pause_media", f"TV already on {TV_MAC_SOURCE}", skip=True))
+    else:
+        plan.append(PlannedStep("step_pause_media", f"KEY_PAUSE on {source}"))
+    plan += [
+        PlannedStep(
+            "step_switch_input",
+            f"already on {TV_MAC_SOURCE}" if on_mac else f"{source or 'unknown'} -> {TV_MAC_SOURCE}",
+            skip=on_mac,
+        ),
+        PlannedStep("wait_for_source", f"wait for {TV_MAC_SOURCE}", skip=on_mac),
+        PlannedStep("step_focus_samsung", "click TV display"),
+        PlannedStep("step_close_samsung_windows", "close other windows on the TV"),
+    ]
+
+    if vpn_country is None:
+        vpn_step = PlannedStep("step_vpn", "already disconnected", skip=True) if vpn == "disconnected" \
+            else PlannedStep("step_vpn", f"disconnect ({vpn or 'state unknown'})")
+    elif vpn is not None and vpn_country in vpn:
+        vpn_step = PlannedStep("step_vpn", f"already connected to {vpn}", skip=True)
+    else:
+        vpn_step = PlannedStep("step_vpn", f"connect {vpn_country} ({vpn or 'state unknown'})")
+    plan.append(vpn_step)
+
+    plan += [
+        PlannedStep("step_open_ci", bookmark),
+        PlannedStep("step_pause_media_ci", "wait for media and pause"),
+        PlannedStep("step_open_migaku", "move Migaku window to TV"),
+        PlannedStep("step_switch_language", f"Migaku -> {language} (skipped if already set)"),
+        PlannedStep("step_fullscreen_migaku", "fullscreen Migaku"),
+        PlannedStep("focus_window", "focus CI window"),
+        PlannedStep("step_pin_toolbar", "pin Migaku toolbar"),
+        PlannedStep("step_fullscreen_ci_video", "fullscreen video player"),
+    ]
+    return plan
+
+
+def print_plan(lang: str) -> None:
+    """Print the plan for lang with per-step estimates from the run history."""
+    session = load_session()
+    if session is not None:
+        print(f"Note: a {session.lang} session is running — `gigaku switch {lang}` would reuse it.\n")
+
+    estimates = step_estimates()
+    total = 0.0
+    unknown = 0
+    print(f"Plan for gigaku {lang}:")
+    for step in build_plan(lang):
+        if step.skip:
+            estimate = "skip"
+        elif step.background:
+            estimate = f"({estimates[step.name]:.1f}s)" if step.name in estimates else "bg"
+        elif step.name in estimates:
+            total += estimates[step.name]
+            estimate = f"{estimates[step.name]:.1f}s"
+        else:
+            unknown += 1
+            estimate = "?"
+        marker = "-" if step.skip else "+"
+        print(f"  {marker} {step.name:<28} {estimate:>6}  {step.note}")
+    suffix = f" (+{unknown} step(s) without history)" if unknown else ""
+    print(f"\nEstimated total: {total:.1f}s{suffix}")
@@ -0,0 +1,130 @@
+"""Sampling profiler for `gigaku --profile <lang>`.
+
+A daemon thread samples the main thread's stack every few milliseconds and
+files each sample under the step that is running (see cli._timed). Every
+sample is also classified by what the main thread was doing:
+
+- applescript: running or waiting for NSAppleScript / osascript
+- network: inside requests, sockets, WebSocket or SSDP
+- sleep: sleeping or waiting on a timer/condition
+- cpu: everything else, i.e. our own Python code
+
+Each sample is weighted by the time since the previous one, so a sampler
+slowed down by a busy main thread doesn't skew the split. write() produces
+one collapsed-stack file per step (`category;frame;... milliseconds` lines,
+readable by flamegraph.pl or speedscope) with the category as the root
+frame, and summary() the per-step split.
+"""
+
+import linecache
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+CATEGORIES = ("applescript", "network", "sleep", "cpu")
+
+_APPLESCRIPT_FUNCTIONS = {"_dispatch", "_execute", "_timed", "waitUntilExit"}
+_NETWORK_MODULES = ("requests", "urllib3", "http", "socket", "ssl", "websocket", "selectors")
+_NETWORK_FUNCTIONS = {"_probe_ports", "_ssdp_location", "_ssdp_scan", "_ws_send", "_http", "_race_set_source"}
+_SLEEP_CALLS = ("sleep(", "pause(", ".wait(", ".wait_for(")
+
+
+def _module(frame) -> str:
+    return frame.f_globals.get("__name__", "")
+
+
+def _classify(frames: list) -> str:
+    """Category for a stack, given root-to-leaf frames."""
+    for frame in frames:
+        module = _module(frame)
+        name = frame.f_code.co_name
+        if module in ("lib.applescript", "lib.osascript") and name in _APPLESCRIPT_FUNCTIONS:
+            return "applescript"
+        if name in _NETWORK_FUNCTIONS or module.split(".")[0] in _NETWORK_MODULES:
+            return "network"
+    leaf = frames[-1]
+    line = linecache.getline(leaf.f_code.co_filename, leaf.f_lineno)
+    if _module(leaf) in ("threading", "lib.context") or any(call in line for call in _SLEEP_CALLS):
+        return "sleep"
+    return "cpu"
+
+
+def _label(frame) -> str:
+    filename = os.path.basename(frame.f_code.co_filename)
+    return f"{frame.f_code.co_name} ({filename}:{frame.f_lineno})".replace(";", ",")
+
+
+class SamplingProfiler:
+    """Samples one thread's stack at a fixed interval, grouped by step."""
+
+    def __init__(self, interval: float = 0.005, thread_id: int | None = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.main_thread().ident
+        self._samples: dict[str, Counter] = {}
+        self._step = "startup"
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._loop, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    @contextmanager
+    def step(self, name: str):
+        """Attribute samples taken while the block runs to step name."""
+        previous, self._step = self._step, name
+        try:
+            yield
+        finally:
+            self._step = previous
+
+    def _loop(self) -> None:
+        last = time.monotonic()
+        while not self._stopping.wait(self.interval):
+            now = time.monotonic()
+            elapsed, last = now - last, now
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            frames = []
+            while frame is not None:
+                frames.append(frame)
+                frame = frame.f_back
+            frames.reverse()
+            stack = ";".join([_classify(frames)] + [_label(f) for f in frames])
+            self._samples.setdefault(self._step, Counter())[stack] += elapsed
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Seconds per category for each step."""
+        result = {}
+        for step, stacks in self._samples.items():
+            seconds = dict.fromkeys(CATEGORIES, 0.0)
+            for stack, spent in stacks.items():
+                seconds[stack.split(";", 1)[0]] += spent
+            result[step] = seconds
+        return result
+
+    def write(self, directory: str) -> list[str]:
+        """Write <step>.folded collapsed stacks into directory. Returns the paths."""
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for step, stacks in self._samples.items():
+            path = os.path.join(directory, f"{step}.folded")
+            with open(path, "w") as f:
+                for stack, spent in stacks.most_common():
+                    f.write(f"{stack} {round(spent * 1000)}\n")
+            paths.append(path)
+        return paths
+
+    def print_summary(self) -> None:
+        print(f"  {'step':<28} " + " ".join(f"{c:>11}" for c in CATEGORIES))
+        for step, seconds in self.summary().items():
+            print(f"  {step:<28} " + " ".join(f"{seconds[c]:>10.2f}s" for c in CATEGORIES))
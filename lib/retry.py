@@ -0,0 +1,83 @@
+"""Retry policy with latency-learned timeouts, jittered backoff and a circuit breaker."""
+
+import random
+import time
+
+
+class CircuitOpenError(Exception):
+    """Raised when calls are refused because of repeated recent failures."""
+
+
+class RetryPolicy:
+    """Shared retry state for one remote endpoint.
+
+    - Timeouts per action follow observed latency (EWMA x margin), clamped to
+      [min_timeout, max_timeout]; unknown actions get max_timeout.
+    - Backoff doubles from base_delay up to max_delay with random jitter.
+    - After failure_threshold consecutive failed calls (a call fails once all
+      its attempts have) the circuit opens and check() fails fast for
+      cooldown seconds.
+
+    Deadlines are time.monotonic() timestamps.
+    """
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 4.0,
+        min_timeout: float = 1.0,
+        max_timeout: float = 5.0,
+        margin: float = 3.0,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+    ):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.margin = margin
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._latency: dict[str, float] = {}  # action -> EWMA seconds
+        self._failures = 0
+        self._open_until = 0.0
+
+    def check(self, action: str) -> None:
+        """Raise CircuitOpenError if the circuit is open."""
+        remaining = self._open_until - time.monotonic()
+        if remaining > 0:
+            raise CircuitOpenError(
+                f"{action} refused: {self._failures} consecutive failed calls, retry in {remaining:.0f}s"
+            )
+
+    def timeout(self, action: str, deadline: float | None = None) -> float:
+        """Request timeout for action, never past the deadline (may be <= 0)."""
+        latency = self._latency.get(action)
+        if latency is None:
+            timeout = self.max_timeout
+        else:
+            timeout = min(self.max_timeout, max(self.min_timeout, latency * self.margin))
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+        return timeout
+
+    def backoff(self, attempt: int, deadline: float | None = None) -> float | None:
+        """Delay before retry number attempt+1, or None if it would pass the deadline."""
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+    def record_success(self, action: str, seconds: float) -> None:
+        previous = self._latency.get(action)
+        self._latency[action] = seconds if previous is None else 0.7 * previous + 0.3 * seconds
+        self._failures = 0
+        self._open_until = 0.0
+
+    def record_failure(self) -> None:
+        """Record a failed call. Call once per call, not per attempt."""
+        self._failures += 1
+        if self._failures >= self.failure_threshold:
+            self._open_until = time.monotonic() + self.cooldown
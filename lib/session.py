@@ -0,0 +1,37 @@
+"""Live session record shared between a running setup and `gigaku switch`."""
+
+import json
+import os
+from dataclasses import asdict, dataclass
+
+from lib.config import SESSION_PATH
+
+
+@dataclass
+class Session:
+    lang: str  # LANG_MAP key currently set up
+    ci_window_id: int
+    migaku_window_id: int
+
+
+def load_session() -> Session | None:
+    """Return the running session, or None if no setup is active."""
+    try:
+        with open(SESSION_PATH, encoding="utf-8") as f:
+            return Session(**json.load(f))
+    except (FileNotFoundError, ValueError, TypeError):
+        return None
+
+
+def save_session(session: Session) -> None:
+    """Record the running session for `gigaku switch`."""
+    with open(SESSION_PATH, "w", encoding="utf-8") as f:
+        json.dump(asdict(session), f)
+
+
+def clear_session() -> None:
+    """Forget the running session (called on teardown)."""
+    try:
+        os.remove(SESSION_PATH)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,67 @@
+"""Facts that rarely change between runs, kept so steps can skip work.
+
+Entries are hints, not truth: each consumer checks an entry with a cheap
+probe before relying on it, falls back to the full path on a mismatch, and
+records what it found. Stored as JSON at STATE_PATH, each value with the
+time it was written.
+
+Keys:
+    migaku_language  language Migaku was last set to
+    ci_bookmarks     {"mtime", "valid", "urls": {subfolder: url}} for one Bookmarks file version
+    samsung_display  DisplayInfo fields of the Samsung display
+"""
+
+import json
+import os
+import threading
+import time
+
+from lib.config import STATE_PATH
+
+_lock = threading.Lock()
+
+
+def _load() -> dict:
+    try:
+        with open(STATE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save(data: dict) -> None:
+    """Write atomically. Best-effort: an unwritable state file is ignored."""
+    tmp = f"{STATE_PATH}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp, STATE_PATH)
+    except OSError:
+        pass
+
+
+def get(key: str, default=None, max_age: float | None = None):
+    """Stored value for key, or default if missing or older than max_age seconds."""
+    with _lock:
+        entry = _load().get(key)
+    if not isinstance(entry, dict) or "value" not in entry:
+        return default
+    if max_age is not None and time.time() - entry.get("at", 0) > max_age:
+        return default
+    return entry["value"]
+
+
+def put(key: str, value) -> None:
+    """Store value for key."""
+    with _lock:
+        data = _load()
+        data[key] = {"value": value, "at": time.time()}
+        _save(data)
+
+
+def forget(key: str) -> None:
+    """Drop key, e.g. after its probe showed it was wrong."""
+    with _lock:
+        data = _load()
+        if data.pop(key, None) is not None:
+            _save(data)
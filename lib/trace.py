@@ -0,0 +1,147 @@
+"""Record/replay of AppleScript and TV traffic for offline regression runs.
+
+With GIGAKU_RECORD=<file> every AppleScript execution and every SOAP/HTTP,
+WebSocket, SSDP and TCP-probe exchange is appended to a JSON-lines trace
+(request, response or error, latency). With GIGAKU_REPLAY=<file> the same
+calls are answered from the trace instead of touching Chrome or the TV, so
+runs work on Linux. GIGAKU_REPLAY_SPEED scales the recorded latency
+(1 = original timing, 0 = instant).
+
+Replay matches calls by (kind, request), not by position, so a caching
+layer that makes fewer calls still replays. Repeated identical requests get
+the recorded responses in order and the last one repeats (polling loops).
+"""
+
+import atexit
+import json
+import threading
+import time
+from collections import Counter, deque
+from collections.abc import Callable
+
+from lib.config import TRACE_RECORD_PATH, TRACE_REPLAY_PATH, TRACE_REPLAY_SPEED
+
+
+class TraceMiss(Exception):
+    """Raised in replay when a call has no recorded response."""
+
+
+_lock = threading.Lock()
+_counts: Counter = Counter()  # kind -> calls this process
+_started = time.monotonic()
+_record_file = None
+_replay: dict[str, deque] | None = None
+_speed = 1.0
+
+
+def _key(kind: str, request: dict) -> str:
+    return kind + ":" + json.dumps(request, sort_keys=True)
+
+
+def start_recording(path: str) -> None:
+    """Append every traced call to path."""
+    global _record_file
+    _record_file = open(path, "a", encoding="utf-8")
+
+
+def start_replay(path: str, speed: float = 1.0) -> None:
+    """Serve traced calls from the recording at path."""
+    global _replay, _speed
+    _replay = {}
+    _speed = speed
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            _replay.setdefault(_key(entry["kind"], entry["request"]), deque()).append(entry)
+
+
+def replaying() -> bool:
+    return _replay is not None
+
+
+def call(
+    kind: str,
+    request: dict,
+    live: Callable[[], object],
+    encode: Callable[[object], object] = lambda value: value,
+    decode: Callable[[object], object] = lambda value: value,
+    errors: dict[str, type] | None = None,
+) -> object:
+    """Run live() — recording it when recording — or answer from the replay trace.
+
+    encode/decode convert the result to and from JSON. errors maps recorded
+    exception class names back to classes so replay re-raises them.
+    """
+    with _lock:
+        _counts[kind] += 1
+    if _replay is not None:
+        return _serve(kind, request, decode, errors or {})
+    if _record_file is None:
+        return live()
+
+    start = time.perf_counter()
+    try:
+        value = live()
+    except Exception as e:
+        _write({
+            "kind": kind,
+            "request": request,
+            "error": {
+                "type": type(e).__name__,
+                "message": str(e),
+                "error_number": getattr(e, "error_number", None),
+            },
+            "latency": time.perf_counter() - start,
+        })
+        raise
+    _write({
+        "kind": kind,
+        "request": request,
+        "response": encode(value),
+        "latency": time.perf_counter() - start,
+    })
+    return value
+
+
+def _write(entry: dict) -> None:
+    entry["at"] = time.monotonic() - _started
+    with _lock:
+        _record_file.write(json.dumps(entry) + "\n")
+        _record_file.flush()
+
+
+def _serve(kind: str, request: dict, decode, errors: dict[str, type]) -> object:
+    with _lock:
+        queue = _replay.get(_key(kind, request))
+        if not queue:
+            raise TraceMiss(f"No recorded {kind} response for {json.dumps(request)[:200]}")
+        entry = queue.popleft() if len(queue) > 1 else queue[0]
+    if _speed:
+        time.sleep(entry["latency"] * _speed)
+    if "error" in entry:
+        error = entry["error"]
+        exc = errors.get(error["type"], RuntimeError)(error["message"])
+        if error.get("error_number") is not None:
+            exc.error_number = error["error_number"]
+        raise exc
+    return decode(entry["response"])
+
+
+def summary() -> dict:
+    """Call counts per kind and wall time since import."""
+    with _lock:
+        return {"calls": dict(_counts), "wall": time.monotonic() - _started}
+
+
+def _print_summary() -> None:
+    stats = summary()
+    calls = ", ".join(f"{kind}={count}" for kind, count in sorted(stats["calls"].items()))
+    print(f"Trace: {calls or 'no calls'} in {stats['wall']:.1f}s")
+
+
+if TRACE_REPLAY_PATH:
+    start_replay(TRACE_REPLAY_PATH, TRACE_REPLAY_SPEED)
+    atexit.register(_print_summary)
+elif TRACE_RECORD_PATH:
+    start_recording(TRACE_RECORD_PATH)
+    atexit.register(_print_summary)
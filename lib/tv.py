@@ -6,11 +6,17 @@ with pairing via HTTP on port 8080.
 """
 
 import binascii
+import errno
+import functools
 import hashlib
 import json
+import os
+import selectors
 import socket
 import struct
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import requests
 import websocket as ws_module
@@ -18,10 +24,14 @@ from Crypto.Cipher import AES
 
 from xml.etree import ElementTree as ET
 
+from lib import context, trace
 from lib._rijndael import encrypt as _rijndael_encrypt
 from lib.config import (
-    TV_IP, TV_MAC_SOURCE, TV_MAC_SOURCE_ID, TV_TOKEN_PATH, TV_UPNP_PORT,
+    POLL_INTERVAL, TV_HEALTH_TTL, TV_IP, TV_MAC_SOURCE, TV_MAC_SOURCE_ID, TV_MAC_SOURCE_KEY,
+    TV_MONITOR_INTERVAL, TV_MONITOR_MAX_AGE, TV_PROBE_TIMEOUT, TV_SWITCH_HEAD_START,
+    TV_TOKEN_PATH, TV_UPNP_PORT,
 )
+from lib.retry import CircuitOpenError, RetryPolicy
 
 # --- Crypto constants (from SmartCrypto) ---
 
@@ -57,6 +67,47 @@ class TVError(Exception):
     """Raised when a TV command fails."""
 
 
+# --- Traced I/O (see lib/trace.py) ---
+
+_HTTP_ERRORS = {
+    "ConnectionError": requests.ConnectionError,
+    "ConnectTimeout": requests.ConnectTimeout,
+    "ReadTimeout": requests.ReadTimeout,
+    "Timeout": requests.Timeout,
+}
+
+
+def _encode_response(resp: requests.Response) -> dict:
+    return {"status": resp.status_code, "text": resp.text, "url": resp.url}
+
+
+def _decode_response(data: dict) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = data["status"]
+    resp._content = data["text"].encode("utf-8")
+    resp.encoding = "utf-8"
+    resp.url = data["url"]
+    resp.reason = ""
+    return resp
+
+
+def _http(method: str, url: str, **kwargs) -> requests.Response:
+    """requests.request() through the trace recorder. Query params are not part of the key.
+
+    The timeout is capped by what is left of the run context.
+    """
+    kwargs["timeout"] = context.current().timeout(kwargs.get("timeout", 5))
+    request = {"method": method, "url": url, "data": kwargs.get("data"), "json": kwargs.get("json")}
+    return trace.call(
+        "http",
+        request,
+        lambda: requests.request(method, url, **kwargs),
+        encode=_encode_response,
+        decode=_decode_response,
+        errors=_HTTP_ERRORS,
+    )
+
+
 # --- Crypto helpers ---
 
 def _sha1(*parts: bytes) -> bytes:
@@ -197,6 +248,36 @@ def _aes_encrypt_command(ctx_hex, session_id, key_press):
     return "5::/com.samsung.companion:" + msg
 
 
+# Keys worth encrypting ahead of time: pause, input switching, menu navigation
+_COMMON_KEYS = (
+    "KEY_PAUSE", "KEY_PLAY", "KEY_HDMI", TV_MAC_SOURCE_KEY, "KEY_SOURCE",
+    "KEY_UP", "KEY_DOWN", "KEY_LEFT", "KEY_RIGHT", "KEY_ENTER", "KEY_RETURN", "KEY_EXIT",
+)
+
+
+@functools.lru_cache(maxsize=256)
+def _key_frame(ctx_hex, session_id, key_press):
+    """Encrypted Socket.IO frame for a key. Deterministic per (ctx, session, key), so cached."""
+    return _aes_encrypt_command(ctx_hex, session_id, key_press)
+
+
+def _session_keys():
+    """Return (ctx, session_id) from the saved token, pairing if needed."""
+    ctx, session_id = _load_token().rsplit(":", 1)
+    try:
+        session_id = int(session_id)
+    except ValueError:
+        pass
+    return ctx, session_id
+
+
+def warm_key_frames(keys=_COMMON_KEYS) -> None:
+    """Pre-encrypt frames for keys so sending them costs no crypto."""
+    ctx, session_id = _session_keys()
+    for key in keys:
+        _key_frame(ctx, session_id, key)
+
+
 # --- Pairing ---
 
 def _pair(host):
@@ -303,37 +384,118 @@ def _load_token():
     return token
 
 
-def _send_keys(keys, delay=0.7):
-    """Connect via Socket.IO and send encrypted key commands."""
-    token = _load_token()
-    ctx, session_id = token.rsplit(":", 1)
-    try:
-        session_id = int(session_id)
-    except ValueError:
-        pass
+def _send_keys(keys, delay=0.7, cancelled: threading.Event | None = None):
+    """Connect via Socket.IO and send encrypted key commands.
+
+    Frames come from the _key_frame cache. If cancelled is set while
+    connecting or between keys, stops sending.
+    """
+    ctx, session_id = _session_keys()
 
     # Get Socket.IO session
     millis = int(round(time.time() * 1000))
-    resp = requests.get(f"http://{TV_IP}:8000/socket.io/1/?t={millis}", timeout=5)
+    resp = _http("GET", f"http://{TV_IP}:8000/socket.io/1/", params={"t": millis}, timeout=5)
     sid = resp.text.split(":")[0]
     ws_url = f"ws://{TV_IP}:8000/socket.io/1/websocket/{sid}"
+    frames = [_key_frame(ctx, session_id, key) for key in keys]
+    # The session id in the URL is random per run, so the frames alone identify the exchange
+    trace.call(
+        "ws",
+        {"frames": frames},
+        lambda: _ws_send(ws_url, frames, delay, cancelled),
+        errors={"WebSocketException": ws_module.WebSocketException},
+    )
+
 
-    ws = ws_module.create_connection(ws_url, timeout=5)
+def _ws_send(ws_url, frames, delay, cancelled):
+    """Open the Socket.IO WebSocket and send frames. Returns how many were sent."""
+    ws = ws_module.create_connection(ws_url, timeout=context.current().timeout(5))
+    sent = 0
     try:
         ws.recv()  # Socket.IO connect message
         ws.send("1::/com.samsung.companion")
-        time.sleep(0.5)
-        for key in keys:
-            ws.send(_aes_encrypt_command(ctx, session_id, key))
-            time.sleep(delay)
+        context.sleep(0.5)
+        for frame in frames:
+            if (cancelled is not None and cancelled.is_set()) or context.current().cancelled:
+                break
+            ws.send(frame)
+            sent += 1
+            context.sleep(delay)
     finally:
         ws.close()
+    return sent
+
+
+# --- Reachability probe ---
+
+_PROBE_PORTS = (TV_UPNP_PORT, 8000, 8080)  # UPnP SOAP, Socket.IO, pairing
+_health: tuple[float, bool] | None = None  # (checked at, reachable), monotonic clock
+
+
+def probe(
+    host: str = TV_IP,
+    ports: tuple[int, ...] = _PROBE_PORTS,
+    timeout: float = TV_PROBE_TIMEOUT,
+) -> dict[int, bool]:
+    """TCP-connect to all ports at once without blocking. Returns {port: accepting}."""
+    return trace.call(
+        "tcp",
+        {"host": host, "ports": list(ports)},
+        lambda: _probe_ports(host, ports, timeout),
+        encode=lambda results: {str(port): ok for port, ok in results.items()},
+        decode=lambda results: {int(port): ok for port, ok in results.items()},
+    )
+
+
+def _probe_ports(host: str, ports: tuple[int, ...], timeout: float) -> dict[int, bool]:
+    results = {port: False for port in ports}
+    sel = selectors.DefaultSelector()
+    socks = []
+    try:
+        for port in ports:
+            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            s.setblocking(False)
+            socks.append(s)
+            err = s.connect_ex((host, port))
+            if err == 0:
+                results[port] = True
+            elif err in (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY):
+                sel.register(s, selectors.EVENT_WRITE, port)
+
+        deadline = time.monotonic() + timeout
+        while sel.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            for key, _ in sel.select(remaining):
+                results[key.data] = key.fileobj.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0
+                sel.unregister(key.fileobj)
+    finally:
+        sel.close()
+        for s in socks:
+            s.close()
+    return results
+
+
+def is_reachable(max_age: float = TV_HEALTH_TTL) -> bool:
+    """Whether the TV answers on any control port, cached for max_age seconds."""
+    global _health
+    now = time.monotonic()
+    if _health is None or now - _health[0] > max_age:
+        _health = (now, any(probe().values()))
+    return _health[1]
+
+
+def _require_reachable() -> None:
+    if not is_reachable():
+        raise TVError(f"TV at {TV_IP} is not reachable (off or in standby)")
 
 
 # --- UPnP SOAP (direct input switching) ---
 
 _SOAP_NS = "urn:samsung.com:service:MainTVAgent2:1"
 _soap_url: str | None = None  # lazily discovered
+_soap_policy = RetryPolicy()  # shared so a sleeping TV fails fast for every caller
 
 
 def _discover_soap_url(timeout: float = 3.0) -> str:
@@ -341,7 +503,30 @@ def _discover_soap_url(timeout: float = 3.0) -> str:
 
     The TV reassigns /smp_N_ paths on reboot, so we can't hardcode them.
     """
-    # SSDP M-SEARCH for MainTVAgent2
+    location = trace.call(
+        "ssdp", {"st": _SOAP_NS, "host": TV_IP},
+        lambda: _ssdp_location(context.current().timeout(timeout)),
+    )
+    if not location:
+        raise TVError(f"SSDP discovery failed — MainTVAgent2 not found at {TV_IP}")
+
+    # Fetch device description XML and extract controlURL
+    resp = _http("GET", location, timeout=5)
+    resp.raise_for_status()
+    root = ET.fromstring(resp.text)
+    for svc in root.iter("{urn:schemas-upnp-org:device-1-0}service"):
+        stype = svc.findtext("{urn:schemas-upnp-org:device-1-0}serviceType", "")
+        if stype == _SOAP_NS:
+            ctrl = svc.findtext("{urn:schemas-upnp-org:device-1-0}controlURL", "")
+            if ctrl:
+                url = f"http://{TV_IP}:{TV_UPNP_PORT}{ctrl}"
+                print(f"Discovered SOAP control URL: {url}")
+                return url
+    raise TVError(f"controlURL for MainTVAgent2 not found in {location}")
+
+
+def _ssdp_location(timeout: float) -> str | None:
+    """SSDP M-SEARCH for MainTVAgent2; returns the TV's LOCATION header or None."""
     msg = (
         "M-SEARCH * HTTP/1.1\r\n"
         "HOST: 239.255.255.250:1900\r\n"
@@ -369,24 +554,7 @@ def _discover_soap_url(timeout: float = 3.0) -> str:
         pass
     finally:
         s.close()
-
-    if not location:
-        raise TVError(f"SSDP discovery failed — MainTVAgent2 not found at {TV_IP}")
-
-    # Fetch device description XML and extract controlURL
-    resp = requests.get(location, timeout=5)
-    resp.raise_for_status()
-    root = ET.fromstring(resp.text)
-    ns = {"upnp": "urn:schemas-upnp-org:device-1-0"}
-    for svc in root.iter("{urn:schemas-upnp-org:device-1-0}service"):
-        stype = svc.findtext("{urn:schemas-upnp-org:device-1-0}serviceType", "")
-        if stype == _SOAP_NS:
-            ctrl = svc.findtext("{urn:schemas-upnp-org:device-1-0}controlURL", "")
-            if ctrl:
-                url = f"http://{TV_IP}:{TV_UPNP_PORT}{ctrl}"
-                print(f"Discovered SOAP control URL: {url}")
-                return url
-    raise TVError(f"controlURL for MainTVAgent2 not found in {location}")
+    return location
 
 
 def _get_soap_url() -> str:
@@ -397,11 +565,16 @@ def _get_soap_url() -> str:
     return _soap_url
 
 
-def _soap_request(action: str, args: str = "") -> str:
+def _soap_request(action: str, args: str = "", deadline: float | None = None, breaker: bool = True) -> str:
     """POST a SOAP envelope to MainTVAgent2. Returns the response body XML.
 
-    Retries up to 3 times (2s between) on connection, timeout, or HTTP errors.
-    On persistent 400, re-discovers the control URL once in case paths changed.
+    Retries on connection, timeout, or HTTP errors with jittered exponential
+    backoff; timeouts follow the action's observed latency. After several
+    failed calls the circuit opens and calls fail immediately for a
+    cool-down. breaker=False calls (input switching, the source monitor's
+    own polling) are never refused and their failures don't count.
+    deadline (time.monotonic()) bounds the whole call including retries, as
+    does the run context's deadline. On persistent 400, re-discovers the control URL once in case paths changed.
     """
     envelope = (
         '<?xml version="1.0" encoding="utf-8"?>'
@@ -418,29 +591,56 @@ def _soap_request(action: str, args: str = "") -> str:
         "Content-Type": 'text/xml; charset="utf-8"',
         "SOAPAction": f'"{_SOAP_NS}#{action}"',
     }
+    if breaker:
+        try:
+            _soap_policy.check(action)
+        except CircuitOpenError as e:
+            raise TVError(f"TV not responding — {e}") from e
+
+    deadline = context.current().clip(deadline)
+    try:
+        return _soap_attempts(action, envelope, headers, deadline)
+    except (TVError, requests.RequestException):
+        if breaker:
+            _soap_policy.record_failure()
+        raise
+
+
+def _soap_attempts(action: str, envelope: str, headers: dict, deadline: float | None) -> str:
+    """The retry loop of _soap_request."""
     global _soap_url
     rediscovered = False
-    for attempt in range(3):
+    for attempt in range(_soap_policy.attempts):
+        context.check()
+        timeout = _soap_policy.timeout(action, deadline)
+        if timeout <= 0:
+            raise TVError(f"SOAP {action} deadline exceeded")
+        start = time.monotonic()
         try:
             url = _get_soap_url()
-            resp = requests.post(url, data=envelope, headers=headers, timeout=5)
+            resp = _http("POST", url, data=envelope, headers=headers, timeout=timeout)
             resp.raise_for_status()
+            _soap_policy.record_success(action, time.monotonic() - start)
             return resp.text
         except (requests.HTTPError, requests.ConnectionError, requests.Timeout) as e:
-            if isinstance(e, requests.HTTPError) and resp.status_code == 400 and not rediscovered:
+            if isinstance(e, requests.HTTPError) and e.response.status_code == 400 and not rediscovered:
                 print(f"SOAP {action} got 400, re-discovering control URL...")
                 _soap_url = None
                 rediscovered = True
                 continue
-            if attempt == 2:
+            if attempt == _soap_policy.attempts - 1:
                 raise
-            print(f"SOAP {action} failed ({e}), retrying in 2s...")
-            time.sleep(2)
+            delay = _soap_policy.backoff(attempt, deadline)
+            if delay is None:
+                raise
+            print(f"SOAP {action} failed ({e}), retrying in {delay:.1f}s...")
+            context.sleep(delay)
+    raise TVError(f"SOAP {action} failed after {_soap_policy.attempts} attempts")
 
 
-def get_current_source() -> str:
-    """Get the TV's current input source (e.g. "HDMI2")."""
-    xml = _soap_request("GetCurrentExternalSource")
+def _fetch_current_source(deadline: float | None = None, breaker: bool = True) -> str:
+    """Ask the TV for its current input source over SOAP."""
+    xml = _soap_request("GetCurrentExternalSource", deadline=deadline, breaker=breaker)
     root = ET.fromstring(xml)
     # Find CurrentExternalSource in response, ignoring namespaces
     for el in root.iter():
@@ -449,6 +649,22 @@ def get_current_source() -> str:
     raise TVError("CurrentExternalSource not found in SOAP response")
 
 
+def get_current_source(deadline: float | None = None, max_age: float = TV_MONITOR_MAX_AGE) -> str:
+    """Get the TV's current input source (e.g. "HDMI2").
+
+    Served from the source monitor when it is running and its reading is at
+    most max_age seconds old; otherwise a SOAP round-trip.
+    """
+    if _monitor is not None:
+        cached = _monitor.get(max_age)
+        if cached is not None:
+            return cached
+    source = _fetch_current_source(deadline=deadline)
+    if _monitor is not None:
+        _monitor.update(source)
+    return source
+
+
 def get_source_list() -> dict[str, int]:
     """Get available sources as {name: id} mapping."""
     xml = _soap_request("GetSourceList")
@@ -467,10 +683,141 @@ def get_source_list() -> dict[str, int]:
     raise TVError("SourceList not found in SOAP response")
 
 
-def set_source(name: str, source_id: int) -> None:
+def set_source(name: str, source_id: int, deadline: float | None = None) -> None:
     """Switch TV input directly via SOAP."""
     args = f"<Source>{name}</Source><ID>{source_id}</ID><UiID>0</UiID>"
-    _soap_request("SetMainTVSource", args)
+    _soap_request("SetMainTVSource", args, deadline=deadline, breaker=False)
+    if _monitor is not None:
+        _monitor.invalidate()
+
+
+# --- Source monitor ---
+
+class SourceMonitor:
+    """Background thread tracking the TV's input source and power state.
+
+    Polls reachability (cheap TCP probe) and, when the TV is on, the current
+    source every interval seconds. Readers get the cached value; waiters are
+    woken through a condition variable when a new reading arrives. Meant for
+    the short stretches where a fresh reading matters (waiting for an input
+    switch); stop it afterwards. Its polling bypasses the SOAP circuit breaker.
+    """
+
+    def __init__(self, interval: float = TV_MONITOR_INTERVAL):
+        self.interval = interval
+        self._cond = threading.Condition()
+        self._source: str | None = None
+        self._powered: bool | None = None
+        self._updated = 0.0  # monotonic time of the last reading, 0 = stale
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._loop, name="tv-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping = True
+        self._wake.set()
+
+    @property
+    def powered(self) -> bool | None:
+        """Last known power state (TV answering on its control ports), None if unknown."""
+        return self._powered
+
+    def _loop(self) -> None:
+        while not self._stopping:
+            self.refresh()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def refresh(self) -> None:
+        """Take one reading now."""
+        powered = any(probe().values())
+        source = None
+        if powered:
+            try:
+                source = _fetch_current_source(deadline=time.monotonic() + self.interval * 2, breaker=False)
+            except (TVError, requests.RequestException, context.Cancelled):
+                pass
+        with self._cond:
+            self._powered = powered
+            self._source = source
+            self._updated = time.monotonic() if source is not None else 0.0
+            self._cond.notify_all()
+
+    def update(self, source: str) -> None:
+        """Record a reading taken elsewhere (e.g. a direct SOAP call)."""
+        with self._cond:
+            self._powered = True
+            self._source = source
+            self._updated = time.monotonic()
+            self._cond.notify_all()
+
+    def invalidate(self) -> None:
+        """Drop the cached source (after a switch) and take a fresh reading soon."""
+        with self._cond:
+            self._updated = 0.0
+        self._wake.set()
+
+    def get(self, max_age: float) -> str | None:
+        """Cached source if read within max_age seconds, else None."""
+        with self._cond:
+            if self._updated and time.monotonic() - self._updated <= max_age:
+                return self._source
+            return None
+
+    def wait_for(self, source: str, timeout: float | None = None) -> bool:
+        """Block until the monitor reads the given source. False on timeout.
+
+        Wakes periodically to raise Cancelled if the run context is cancelled.
+        """
+        run = context.current()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not (self._updated and self._source == source):
+                run.check()
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(0.25 if remaining is None else min(remaining, 0.25))
+            return True
+
+
+_monitor: SourceMonitor | None = None
+
+
+def start_monitor() -> SourceMonitor:
+    """Start the background source monitor (idempotent)."""
+    global _monitor
+    if _monitor is None:
+        _monitor = SourceMonitor()
+        _monitor.start()
+    return _monitor
+
+
+def stop_monitor() -> None:
+    """Stop the background source monitor; reads go back to SOAP."""
+    global _monitor
+    if _monitor is not None:
+        _monitor.stop()
+        _monitor = None
+
+
+def wait_for_source(source: str, timeout: float | None = None) -> bool:
+    """Block until the TV is on the given source. False on timeout.
+
+    Uses the monitor's condition variable when running, otherwise polls SOAP.
+    """
+    if _monitor is not None:
+        return _monitor.wait_for(source, timeout)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while deadline is None or time.monotonic() < deadline:
+        if get_current_source() == source:
+            return True
+        context.sleep(POLL_INTERVAL)
+    return False
 
 
 # --- Public API ---
@@ -482,29 +829,98 @@ def send_key(key: str) -> None:
     _send_keys([key])
 
 
+def send_key_sequence(keys: list[str], delay: float = 0.7) -> None:
+    """Send several remote keys over one WebSocket connection using cached frames."""
+    if not TV_IP:
+        raise TVError("TV_IP not set in lib/config.py — run step_wait_samsung with 'discover' to find it")
+    _send_keys(keys, delay=delay)
+
+
 def switch_to_hdmi1() -> None:
     """Switch TV input back to HDMI1 via SOAP."""
     if not TV_IP:
         raise TVError("TV_IP not set in lib/config.py — run step_wait_samsung with 'discover' to find it")
 
+    if not is_reachable():
+        print("TV not reachable, skipping switch to HDMI1.")
+        return
     print("Switching TV input to HDMI1 via SOAP...")
     set_source("HDMI1", 57)
     print("TV input switched to HDMI1.")
 
 
+def _race_set_source(name: str, source_id: int, key: str) -> str:
+    """Switch input via SOAP, falling back to the WebSocket key path if SOAP fails or is slow.
+
+    SOAP gets a TV_SWITCH_HEAD_START lead. If it fails within it, the
+    encrypted WebSocket sends the source key right away; if it is still
+    running by then, the WebSocket races it. The first path to succeed wins
+    and the other is cancelled (an in-flight SOAP request is abandoned, the
+    WebSocket stops before sending). Returns the winning path. Raises
+    Cancelled as soon as the run is cancelled, not as a failed switch.
+    """
+    cancelled = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tv-switch")
+    try:
+        soap = pool.submit(set_source, name, source_id)
+        paired = os.path.exists(TV_TOKEN_PATH)
+        if paired:
+            warm_key_frames((key,))  # crypto done during SOAP's head start
+        head_start_end = time.monotonic() + TV_SWITCH_HEAD_START
+        while not soap.done() and time.monotonic() < head_start_end:
+            context.check()
+            wait([soap], timeout=min(0.25, max(0.0, head_start_end - time.monotonic())))
+        context.check()
+        if soap.done() and soap.exception() is None:
+            return "SOAP"
+        if not paired:
+            # No WebSocket pairing to fall back to
+            soap.result()
+            return "SOAP"
+
+        if soap.done():
+            print(f"SOAP failed ({soap.exception()}), sending WebSocket {key}...")
+        else:
+            print(f"SOAP slow, racing WebSocket {key}...")
+        websocket = pool.submit(_send_keys, [key], cancelled=cancelled)
+        pending = {soap, websocket}
+        while pending:
+            context.check()
+            done, pending = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    return "SOAP" if future is soap else "WebSocket"
+                if isinstance(error, context.Cancelled):
+                    raise error
+        raise TVError(
+            f"Input switch failed — SOAP: {soap.exception()}; WebSocket: {websocket.exception()}"
+        )
+    finally:
+        cancelled.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
 def switch_to_mac() -> None:
-    """Switch TV input to Mac's HDMI port via SOAP."""
+    """Switch TV input to Mac's HDMI port via SOAP, racing WebSocket if SOAP stalls."""
     if not TV_IP:
         raise TVError("TV_IP not set in lib/config.py — run step_wait_samsung with 'discover' to find it")
+    _require_reachable()
 
-    current = get_current_source()
-    print(f"TV current input: {current}")
+    try:
+        # Not worth holding up the switch for: a slow read just means switching anyway
+        current = get_current_source(deadline=time.monotonic() + TV_SWITCH_HEAD_START)
+    except (TVError, requests.RequestException) as e:
+        print(f"TV current input unknown ({e}), switching anyway")
+        current = None
+    else:
+        print(f"TV current input: {current}")
     if current == TV_MAC_SOURCE:
         print("Already on Mac input, skipping switch.")
         return
-    print(f"Switching TV input to {TV_MAC_SOURCE} via SOAP...")
-    set_source(TV_MAC_SOURCE, TV_MAC_SOURCE_ID)
-    print(f"TV input switched to {TV_MAC_SOURCE}.")
+    print(f"Switching TV input to {TV_MAC_SOURCE}...")
+    path = _race_set_source(TV_MAC_SOURCE, TV_MAC_SOURCE_ID, TV_MAC_SOURCE_KEY)
+    print(f"TV input switched to {TV_MAC_SOURCE} via {path}.")
 
 
 def discover(timeout: float = 3.0) -> list[str]:
@@ -521,11 +937,15 @@ def discover(timeout: float = 3.0) -> list[str]:
         f"ST: {ST}\r\n"
         "\r\n"
     )
+    return trace.call("ssdp", {"st": ST}, lambda: _ssdp_scan(msg, SSDP_ADDR, SSDP_PORT, timeout))
+
 
+def _ssdp_scan(msg: str, ssdp_addr: str, ssdp_port: int, timeout: float) -> list[str]:
+    """Send an SSDP M-SEARCH and collect responder IPs until timeout."""
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
     sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, struct.pack("b", 2))
     sock.settimeout(timeout)
-    sock.sendto(msg.encode(), (SSDP_ADDR, SSDP_PORT))
+    sock.sendto(msg.encode(), (ssdp_addr, ssdp_port))
 
     ips: list[str] = []
     try:
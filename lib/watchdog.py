@@ -0,0 +1,113 @@
+"""Post-setup supervisor: notices drift from the set-up state and re-applies only that step.
+
+Nothing here is event-driven: every WATCHDOG_INTERVAL seconds each check
+is probed once. Probes go through CachedProbe, so one JavaScript call
+answers every check that reads the same page. Idle load is a couple of
+Apple Events, a TCP probe and one SOAP request per interval.
+
+A check is re-applied once. If it drifts again within WATCHDOG_COOLDOWN
+seconds of that, the change is taken as deliberate (e.g. watching another
+input) and the check is left alone until it is back in its set-up state. A
+fix that fails is retried with a doubling delay, and after _MAX_FAILURES in a
+row the check is left alone the same way.
+"""
+
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from lib import context
+from lib.config import SETUP_BUDGET, WATCHDOG_COOLDOWN, WATCHDOG_INTERVAL
+
+_MAX_FAILURES = 3
+
+
+class CachedProbe:
+    """Calls fn at most once per ttl seconds. A failing probe reads as None."""
+
+    def __init__(self, fn: Callable[[], object], ttl: float = 1.0):
+        self.fn = fn
+        self.ttl = ttl
+        self._value = None
+        self._at = float("-inf")
+
+    def __call__(self) -> object:
+        if time.monotonic() - self._at > self.ttl:
+            try:
+                self._value = self.fn()
+            except Exception:
+                self._value = None
+            self._at = time.monotonic()
+        return self._value
+
+
+@dataclass
+class Check:
+    """A piece of set-up state: healthy() returns True, False (drifted) or None (can't tell)."""
+    name: str
+    healthy: Callable[[], bool | None]
+    fix: Callable[[], None]
+    last_fix: float = float("-inf")  # monotonic time of the last fix attempt
+    fixed: bool = False  # whether that attempt succeeded
+    failures: int = 0  # failed fix attempts in a row
+    paused: bool = False  # left alone until healthy again
+
+
+class Watchdog:
+    def __init__(
+        self,
+        checks: list[Check],
+        interval: float = WATCHDOG_INTERVAL,
+        cooldown: float = WATCHDOG_COOLDOWN,
+    ):
+        self.checks = checks
+        self.interval = interval
+        self.cooldown = cooldown
+
+    def _pause(self, check: Check, why: str) -> None:
+        check.paused = True
+        print(f"Watchdog: {check.name} {why}; leaving it alone until it is back")
+
+    def _apply(self, check: Check) -> None:
+        """Re-apply check if it drifted, unless the drift looks deliberate or fixing keeps failing."""
+        healthy = check.healthy()
+        if healthy is None:
+            return
+        if healthy:
+            if check.paused:
+                print(f"Watchdog: {check.name} is back, watching it again")
+            check.paused = False
+            check.failures = 0
+            return
+        if check.paused:
+            return
+        since = time.monotonic() - check.last_fix
+        if check.fixed and since < self.cooldown:
+            self._pause(check, f"changed again {since:.0f}s after being re-applied")
+            return
+        if check.failures and since < self.cooldown * 2 ** (check.failures - 1):
+            return
+        print(f"Watchdog: {check.name} drifted, re-applying...")
+        check.last_fix = time.monotonic()
+        run = context.start(SETUP_BUDGET, "watchdog")
+        try:
+            check.fix()
+            check.fixed = True
+            check.failures = 0
+        except (Exception, context.Cancelled) as e:
+            if isinstance(e, context.Cancelled) and not run.expired:
+                raise  # Ctrl+C: end the session
+            check.fixed = False
+            check.failures += 1
+            print(f"  Watchdog: re-applying {check.name} failed: {e}")
+            if check.failures >= _MAX_FAILURES:
+                self._pause(check, f"could not be re-applied {check.failures} times")
+        finally:
+            context.start(name="session")
+
+    def run(self) -> None:
+        """Supervise until the run context is cancelled (Ctrl+C)."""
+        while True:
+            for check in self.checks:
+                self._apply(check)
+            context.sleep(self.interval)
@@ -10,9 +10,9 @@ from lib.chrome import close_windows_on_display
 from lib.display import DisplayInfo, find_samsung_display
 
 
-def run(samsung: DisplayInfo) -> None:
-    """Close Chrome windows positioned on the Samsung display."""
-    close_windows_on_display(samsung)
+def run(samsung: DisplayInfo, keep: list[int] | None = None) -> None:
+    """Close Chrome windows positioned on the Samsung display, except those in keep."""
+    close_windows_on_display(samsung, exclude=keep)
     print("Closed existing Chrome windows on Samsung display")
 
 
@@ -6,28 +6,30 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-import Foundation
+from concurrent.futures import Future
+
+from lib import osascript
+
+
+def _report(future: Future) -> None:
+    try:
+        print(future.result())
+    except Exception as e:
+        print(f"Warning: could not check Bluetooth ({e})")
+
+
+def start() -> Future:
+    """Check/enable Bluetooth in the background. Returns a Future of the status line.
+
+    IOBluetooth framework aborts in Python CLI processes (macOS Sequoia
+    security restriction), so the script runs in an osascript process.
+    """
+    return osascript.submit(_APPLESCRIPT, callback=_report)
 
 
 def run() -> None:
     """Enable Bluetooth if currently off."""
-    # IOBluetooth framework aborts in Python CLI processes (macOS Sequoia
-    # security restriction). Run via osascript in a separate process using
-    # NSTask (Cocoa API, not subprocess).
-    pipe = Foundation.NSPipe.pipe()
-    err_pipe = Foundation.NSPipe.pipe()
-    task = Foundation.NSTask.alloc().init()
-    task.setLaunchPath_("/usr/bin/osascript")
-    task.setArguments_(["-e", _APPLESCRIPT])
-    task.setStandardOutput_(pipe)
-    task.setStandardError_(err_pipe)
-    task.launch()
-    task.waitUntilExit()
-
-    data = pipe.fileHandleForReading().readDataToEndOfFile()
-    output = Foundation.NSString.alloc().initWithData_encoding_(data, 4)  # UTF-8
-    if output:
-        print(str(output).strip())
+    start().result()
 
 
 _APPLESCRIPT = """\
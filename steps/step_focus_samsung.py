@@ -2,7 +2,6 @@
 """Move cursor to Samsung display center and click to focus."""
 
 import sys
-import time
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -17,6 +16,7 @@ from Quartz.CoreGraphics import (
     kCGMouseButtonLeft,
 )
 
+from lib import context
 from lib.display import DisplayInfo, find_samsung_display
 
 
@@ -28,12 +28,12 @@ def run(samsung: DisplayInfo) -> None:
     # Move cursor
     move = CGEventCreateMouseEvent(None, kCGEventMouseMoved, (x, y), 0)
     CGEventPost(kCGHIDEventTap, move)
-    time.sleep(0.1)
+    context.sleep(0.1)
 
     # Click
     down = CGEventCreateMouseEvent(None, kCGEventLeftMouseDown, (x, y), kCGMouseButtonLeft)
     CGEventPost(kCGHIDEventTap, down)
-    time.sleep(0.05)
+    context.sleep(0.05)
     up = CGEventCreateMouseEvent(None, kCGEventLeftMouseUp, (x, y), kCGMouseButtonLeft)
     CGEventPost(kCGHIDEventTap, up)
 
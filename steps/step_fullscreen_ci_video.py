@@ -2,23 +2,31 @@
 """Make the Netflix video player fullscreen via 'f' keystroke."""
 
 import sys
-import time
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from lib.chrome import exec_js_on_window, send_keystroke_to_window
+from lib import context
+from lib.chrome import exec_js_batch, send_keystroke_to_window
 
 
 def run(ci_window_id: int) -> None:
     """Send 'f' to fullscreen the Netflix video player. Skips non-Netflix pages."""
-    hostname = exec_js_on_window(ci_window_id, "window.location.hostname")
+    page = exec_js_batch(ci_window_id, {
+        "hostname": "window.location.hostname",
+        "fullscreen": "!!document.fullscreenElement",
+    })
+    hostname = page["hostname"]
     if hostname is None or "netflix" not in hostname:
         print(f"CI page is not Netflix ({hostname}), skipping video fullscreen")
         return
+    # 'f' toggles, so pressing it again would leave fullscreen
+    if page["fullscreen"]:
+        print("Netflix video already fullscreen")
+        return
 
     send_keystroke_to_window(ci_window_id, "f")
-    time.sleep(1)
+    context.sleep(1)
     print("Netflix video fullscreened")
 
 
@@ -3,37 +3,50 @@
 
 import sys
 from pathlib import Path
+from urllib.parse import urlsplit
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from lib import applescript
-from lib.chrome import get_ci_bookmark_url, open_url_in_new_window
+from lib.chrome import (
+    WindowSpec,
+    display_bounds,
+    exec_js_on_window,
+    focus_window,
+    get_ci_bookmark_url,
+    move_window_to_display,
+    open_windows,
+    set_window_url,
+)
 from lib.display import DisplayInfo, find_samsung_display
 
 
-def _maximize_on_samsung(window_id: int, samsung: DisplayInfo) -> None:
-    """Set Chrome window bounds to fill the Samsung display before fullscreening."""
-    x1 = samsung.x
-    y1 = samsung.y
-    x2 = samsung.x + samsung.width
-    y2 = samsung.y + samsung.height
-    applescript.run(f'''\
-tell application "Google Chrome"
-    repeat with w in windows
-        if (id of w as text) = "{window_id}" then
-            set bounds of w to {{{x1}, {y1}, {x2}, {y2}}}
-            exit repeat
-        end if
-    end repeat
-end tell''')
-
-
-def run(samsung: DisplayInfo, subfolder: str = "ger") -> int:
-    """Open CI bookmark URL in a new Chrome window and fullscreen it. Returns window ID."""
+def _same_page(current: str | None, url: str) -> bool:
+    """Whether current shows url, ignoring the query and fragment the site adds (e.g. ?trackId=)."""
+    if not current:
+        return False
+    a, b = urlsplit(current), urlsplit(url)
+    return a.netloc == b.netloc and a.path.rstrip("/") == b.path.rstrip("/")
+
+
+def run(samsung: DisplayInfo, subfolder: str = "ger", window_id: int | None = None) -> int:
+    """Open CI bookmark URL in a Chrome window filling the Samsung display. Returns window ID.
+
+    If window_id is given (a window preloaded by step_prefetch), it is moved onto
+    the Samsung display instead of opening a new one, and navigated to the
+    bookmark if it is not already showing that page. Filling the display before
+    fullscreening keeps the video on the TV.
+    """
     url = get_ci_bookmark_url(subfolder)
-    window_id = open_url_in_new_window(url, samsung)
-    print(f"Opened CI in Chrome window {window_id}")
-    _maximize_on_samsung(window_id, samsung)
+    bounds = display_bounds(samsung)
+    if window_id is None:
+        window_id = open_windows([WindowSpec(url, bounds)])[0]
+        focus_window(window_id)
+        print(f"Opened CI in Chrome window {window_id}")
+    else:
+        move_window_to_display(window_id, samsung, bounds)
+        if not _same_page(exec_js_on_window(window_id, "window.location.href"), url):
+            set_window_url(window_id, url)
+        print(f"Moved preloaded CI window {window_id} to Samsung")
     return window_id
 
 
@@ -6,15 +6,23 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from lib.chrome import open_url_in_new_window
+from lib.chrome import move_window_to_display, open_url_in_new_window
 from lib.config import MIGAKU_APP_URL
 from lib.display import DisplayInfo, find_samsung_display
 
 
-def run(samsung: DisplayInfo) -> int:
-    """Open Migaku app URL in a new Chrome window. Returns window ID."""
-    window_id = open_url_in_new_window(MIGAKU_APP_URL, samsung)
-    print(f"Opened Migaku in Chrome window {window_id}")
+def run(samsung: DisplayInfo, window_id: int | None = None) -> int:
+    """Open Migaku app URL in a Chrome window on Samsung. Returns window ID.
+
+    If window_id is given (a window preloaded by step_prefetch), it is moved onto
+    the Samsung display instead of opening a new one.
+    """
+    if window_id is None:
+        window_id = open_url_in_new_window(MIGAKU_APP_URL, samsung)
+        print(f"Opened Migaku in Chrome window {window_id}")
+    else:
+        move_window_to_display(window_id, samsung)
+        print(f"Moved preloaded Migaku window {window_id} to Samsung")
     return window_id
 
 
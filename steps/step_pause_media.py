@@ -7,8 +7,10 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+from lib import page_runtime
 from lib.chrome import exec_js_on_window
 from lib.config import TV_MAC_SOURCE
+from lib.history import WaitBudget
 
 
 def run(ci_window_id: int | None = None) -> None:
@@ -20,10 +22,13 @@ def run(ci_window_id: int | None = None) -> None:
     # Pause HDMI1 device if TV is currently on a non-Mac input
     if ci_window_id is None:
         try:
-            from lib.tv import get_current_source, send_key
+            from lib.tv import get_current_source, is_reachable, send_key
 
-            current = get_current_source()
-            if current != TV_MAC_SOURCE:
+            # A TV in standby shouldn't hold up setup
+            current = get_current_source(deadline=time.monotonic() + 5) if is_reachable() else None
+            if current is None:
+                print("TV not reachable, skipping pause.")
+            elif current != TV_MAC_SOURCE:
                 print(f"TV on {current}, sending KEY_PAUSE...")
                 send_key("KEY_PAUSE")
                 print("Sent KEY_PAUSE.")
@@ -35,29 +40,17 @@ def run(ci_window_id: int | None = None) -> None:
     # Pause CI Chrome window via JS
     if ci_window_id is not None:
         print(f"Waiting for media to load in CI window {ci_window_id}...")
-        for attempt in range(30):
-            result = exec_js_on_window(ci_window_id, (
-                "var m = document.querySelector('video') || document.querySelector('audio');"
-                " if (!m) {"
-                "   var frames = document.querySelectorAll('iframe');"
-                "   for (var i = 0; i < frames.length; i++) {"
-                "     try { var fd = frames[i].contentDocument;"
-                "       if (fd) { m = fd.querySelector('video') || fd.querySelector('audio'); }"
-                "     } catch(e) {}"
-                "     if (m) break;"
-                "   }"
-                " }"
-                " var r = 'no_media';"
-                " if (m && m.readyState >= 3) { m.pause(); r = 'paused'; }"
-                " else if (m) { r = 'loading'; }"
-                " r"
-            ))
+        wait = WaitBudget("pause_media_ci", timeout=30, interval=1)
+        for attempt in wait.polls():
+            result = page_runtime.call(
+                lambda js: exec_js_on_window(ci_window_id, js), "pauseMedia"
+            )
             if result == "paused":
+                wait.done()
                 print(f"Paused media in CI window {ci_window_id}.")
                 return
-            print(f"  {result} (attempt {attempt + 1}/30)")
-            time.sleep(1)
-        print("Warning: no media found or loaded after 30s, skipping pause.")
+            print(f"  {result} (attempt {attempt + 1}, {wait.elapsed:.1f}/{wait.timeout:.0f}s)")
+        print(f"Warning: no media found or loaded after {wait.timeout:.0f}s, skipping pause.")
 
 
 if __name__ == "__main__":
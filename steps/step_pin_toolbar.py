@@ -2,13 +2,14 @@
 """Pin the Migaku toolbar on the CI page."""
 
 import sys
-import time
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+from lib import page_runtime
 from lib.applescript import AppleScriptError
 from lib.chrome import exec_js_on_window
+from lib.history import WaitBudget
 
 
 class PinToolbarError(Exception):
@@ -30,32 +31,19 @@ def _exec_js(window_id: int, js: str) -> str | None:
 def run(ci_window_id: int) -> None:
     """Pin the Migaku toolbar on the CI page. Raises PinToolbarError on failure."""
     # Poll for the Migaku shadow DOM to appear (toolbar injects after page load)
-    for attempt in range(20):
-        result = _exec_js(ci_window_id, (
-            "var host = document.querySelector('#MigakuShadowDom');"
-            " if (!host || !host.shadowRoot) 'no-shadow';"
-            " else {"
-            "   var btns = host.shadowRoot.querySelectorAll('button');"
-            "   var found = 'no-button';"
-            "   for (var i = 0; i < btns.length; i++) {"
-            "     var label = btns[i].getAttribute('aria-label') || '';"
-            "     if (label.indexOf('toolbar') !== -1) {"
-            "       if (label === 'Pin toolbar') { btns[i].click(); found = 'pinned'; }"
-            "       else { found = 'already-pinned'; }"
-            "       break;"
-            "     }"
-            "   } found;"
-            " }"
-        ))
+    wait = WaitBudget("pin_toolbar", timeout=10, interval=0.5)
+    for _ in wait.polls():
+        result = page_runtime.call(lambda js: _exec_js(ci_window_id, js), "pinToolbar")
         if result == "pinned":
+            wait.done()
             print("Migaku toolbar pinned")
             return
         if result == "already-pinned":
+            wait.done()
             print("Migaku toolbar already pinned")
             return
-        time.sleep(0.5)
 
-    raise PinToolbarError(f"Migaku toolbar not found after 10s (last result: {result})")
+    raise PinToolbarError(f"Migaku toolbar not found after {wait.timeout:.0f}s (last result: {result})")
 
 
 if __name__ == "__main__":
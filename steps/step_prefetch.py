@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Open the Migaku and CI windows in the background before the TV is ready."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from lib.chrome import WindowSpec, display_bounds, get_ci_bookmark_url, open_windows
+from lib.config import MIGAKU_APP_URL
+from lib.display import find_samsung_display
+
+
+def run(subfolder: str = "ger", preload_ci: bool = True) -> tuple[int, int]:
+    """Open Migaku and CI windows without activating Chrome. Returns (ci_window_id, migaku_window_id).
+
+    Both windows are created in one call. If the Samsung display is already
+    connected they are created at their final place on it (CI filling the
+    display, Migaku inset), so the open steps only bring them to front.
+
+    With preload_ci=False the CI window is opened blank — the bookmark must only
+    load once the VPN is connected, otherwise the site serves the wrong region.
+    """
+    samsung = find_samsung_display()
+    ci_url = get_ci_bookmark_url(subfolder) if preload_ci else "about:blank"
+    ci_window_id, migaku_window_id = open_windows([
+        WindowSpec(ci_url, display_bounds(samsung) if samsung else None),
+        WindowSpec(MIGAKU_APP_URL, display_bounds(samsung, inset=100) if samsung else None),
+    ])
+    print(f"Preloading Migaku in Chrome window {migaku_window_id}")
+    if preload_ci:
+        print(f"Preloading CI in Chrome window {ci_window_id}")
+    else:
+        print(f"Opened blank CI window {ci_window_id} (loads after VPN)")
+    return ci_window_id, migaku_window_id
+
+
+if __name__ == "__main__":
+    sf = sys.argv[1] if len(sys.argv) > 1 else "ger"
+    print(run(sf))
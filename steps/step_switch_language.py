@@ -1,25 +1,27 @@
 #!/usr/bin/env python3
 """Switch Migaku extension language via AppleScript JS execution."""
 
+import re
 import sys
-import time
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+from lib import context, state
 from lib.applescript import AppleScriptError
-from lib.chrome import dismiss_chrome_dialogs, exec_js_on_extension
+from lib.chrome import dismiss_chrome_dialogs, exec_js_batch, exec_js_on_extension
 from lib.config import AVAILABLE_LANGUAGES, MIGAKU_EXTENSION_ID
+from lib.history import WaitBudget
 
 
 class LanguageSwitchError(Exception):
     """Raised when the language switch fails."""
 
 
-def _exec_js(js: str) -> str | None:
-    """Execute JavaScript on the Migaku extension tab in Chrome."""
+def _checked(fn, *args):
+    """Call a Chrome JS function, explaining the setting it needs if JS is off."""
     try:
-        return exec_js_on_extension(MIGAKU_EXTENSION_ID, js)
+        return fn(*args)
     except AppleScriptError as e:
         if "JavaScript through AppleScript is turned off" in str(e):
             raise LanguageSwitchError(
@@ -28,6 +30,82 @@ def _exec_js(js: str) -> str | None:
         raise
 
 
+def _exec_js(js: str) -> str | None:
+    """Execute JavaScript on the Migaku extension tab in Chrome."""
+    return _checked(exec_js_on_extension, MIGAKU_EXTENSION_ID, js)
+
+
+_SELECTOR_HASH = "#/language-select"
+
+# The language select button shows the active language (text, flag alt text
+# or aria-label, depending on the app version)
+_HEADER_JS = (
+    "(function () {"
+    " var b = document.querySelector('.LangSelectButton');"
+    " if (!b) return null;"
+    " var parts = [b.textContent || '', b.getAttribute('aria-label') || ''];"
+    " var imgs = b.querySelectorAll('img');"
+    " for (var i = 0; i < imgs.length; i++) { parts.push(imgs[i].alt || ''); }"
+    " return parts.join(' ');"
+    "})()"
+)
+
+
+def _page_state() -> dict:
+    """Read the Migaku route and header in one execution.
+
+    Returns {"hash", "header", "language"}; header is None when the language
+    select button isn't shown, language is None unless the header names
+    exactly one language as a whole word (a label mentioning two is no signal).
+    """
+    page = _checked(exec_js_batch, MIGAKU_EXTENSION_ID, {
+        "hash": "window.location.hash",
+        "header": _HEADER_JS,
+    })
+    text = page["header"] or ""
+    named = [name for name in AVAILABLE_LANGUAGES if re.search(rf"\b{name}\b", text)]
+    page["language"] = named[0] if len(named) == 1 else None
+    return page
+
+
+def _wait_for_state(name: str, ready, timeout: float) -> tuple[bool, dict]:
+    """Poll the page state until ready(page). Returns (ready, last page state read)."""
+    wait = WaitBudget(name, timeout=timeout, interval=0.25)
+    page = {}
+    for _ in wait.polls():
+        page = _page_state()
+        if ready(page):
+            wait.done()
+            return True, page
+    return False, page
+
+
+def _wait_for(name: str, js: str, timeout: float, interval: float = 0.25) -> bool:
+    """Poll a JS expression on the Migaku tab until it returns 'yes'. Returns False on timeout."""
+    wait = WaitBudget(name, timeout=timeout, interval=interval)
+    for _ in wait.polls():
+        if _exec_js(js) == "yes":
+            wait.done()
+            return True
+    return False
+
+
+def _wait_for_applied(language: str, timeout: float = 5) -> bool:
+    """Wait until Migaku leaves the selector and its header shows the language."""
+    applied, _ = _wait_for_state(
+        "language_applied",
+        lambda page: page["hash"] != _SELECTOR_HASH and page["language"] == language,
+        timeout,
+    )
+    return applied
+
+
+_LANGUAGE_BUTTONS_JS = (
+    "var ps = document.querySelectorAll('button p');"
+    " ps.length ? 'yes' : 'no'"
+)
+
+
 def run(language: str = "German") -> None:
     """Switch Migaku to the given language. Raises LanguageSwitchError on failure."""
     if language not in AVAILABLE_LANGUAGES:
@@ -36,16 +114,33 @@ def run(language: str = "German") -> None:
         )
 
     try:
+        # Fast path: most runs don't change language. When the last run left
+        # Migaku on this language, one read usually confirms it without
+        # waiting for the page to settle.
+        page = {}
+        if state.get("migaku_language") == language:
+            page = _page_state()
+        if page.get("language") != language:
+            # The same read tells whether the selector is already open
+            _, page = _wait_for_state(
+                "migaku_ready",
+                lambda page: page["header"] is not None or page["hash"] == _SELECTOR_HASH,
+                timeout=10,
+            )
+        if page.get("language") == language:
+            state.put("migaku_language", language)
+            print(f"Migaku already on {language}")
+            return
+
         # Navigate to language selection if not already there
-        page = _exec_js("window.location.hash")
-        if page != "#/language-select":
+        if page.get("hash") != _SELECTOR_HASH:
             result = _exec_js(
                 "document.querySelector('.LangSelectButton')"
                 " ? (document.querySelector('.LangSelectButton').click(), 'clicked')"
                 " : (window.location.hash = '#/language-select', 'navigated')"
             )
             print(f"Opened language selector ({result})")
-            time.sleep(2)
+            _wait_for("language_buttons", _LANGUAGE_BUTTONS_JS, timeout=5)
 
         # Click the target language, retry with Escape if not found
         for attempt in range(3):
@@ -66,13 +161,18 @@ def run(language: str = "German") -> None:
                 dismiss_chrome_dialogs()
                 # Dismiss proxy auth dialog by stopping page loads, then reload hash
                 _exec_js("window.stop()")
-                time.sleep(1)
+                context.sleep(1)
                 _exec_js("window.location.hash = '#/language-select'")
-                time.sleep(2)
+                _wait_for("language_buttons", _LANGUAGE_BUTTONS_JS, timeout=5)
         else:
             raise LanguageSwitchError(f"Language '{language}': {result}")
 
-        time.sleep(5)
+        if not _wait_for_applied(language):
+            # The header is a best-effort signal: this costs what the old fixed wait did
+            print(f"Switched to {language} (not confirmed by the Migaku header)")
+            state.forget("migaku_language")
+            return
+        state.put("migaku_language", language)
         print(f"Switched to {language}")
 
     except LanguageSwitchError:
@@ -2,15 +2,25 @@
 """Step: Connect to or disconnect from VPN via the NordVPN Chrome extension."""
 
 import sys
-import time
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from lib.applescript import AppleScriptError, run as applescript
-from lib.chrome import exec_js_on_extension, make_window_fullscreen, open_url_in_new_window
+from lib import context, page_runtime
+from lib.applescript import AppleScriptError
+from lib.chrome import (
+    WindowSpec,
+    close_tabs_matching,
+    exec_js_on_extension,
+    is_running,
+    make_window_fullscreen,
+    open_url_in_new_window,
+    open_windows,
+    snapshot_tabs,
+)
 from lib.config import NORDVPN_EXTENSION_ID, NORDVPN_POPUP_URL
 from lib.display import DisplayInfo, find_samsung_display
+from lib.history import WaitBudget
 
 
 class VPNError(Exception):
@@ -29,118 +39,154 @@ def _exec_js(js: str) -> str | None:
         raise
 
 
-def _close_vpn_window(window_id: int) -> None:
-    """Close the NordVPN Chrome window."""
+def _helper(fn: str, *args) -> object:
+    """Call a window.__gigaku helper on the NordVPN extension tab."""
+    return page_runtime.call(_exec_js, fn, *args)
+
+
+def _close_vpn_tabs() -> None:
+    """Close every NordVPN tab (and its window, if it was the last tab)."""
     try:
-        applescript(f'''
-tell application "Google Chrome"
-    repeat with w in windows
-        if (id of w as text) = "{window_id}" then
-            close w
-            return
-        end if
-    end repeat
-end tell
-''')
-        print(f"Closed NordVPN window {window_id}")
+        if close_tabs_matching(lambda tab: NORDVPN_EXTENSION_ID in tab.url):
+            print("Closed NordVPN tab")
     except AppleScriptError:
         pass
 
 
-def _wait_for_ui(timeout: int = 15) -> None:
-    """Wait for the NordVPN React UI to render."""
-    deadline = time.time() + timeout
-    while time.time() < deadline:
-        result = _exec_js(
-            "var el = document.querySelector('[data-testid=\"location-card-search-input\"]')"
-            " || document.querySelector('[data-testid=\"connection-card-quick-connect-button\"]')"
-            " || document.querySelector('[data-testid=\"connection-card-disconnect-button\"]');"
-            " el ? 'ready' : 'loading'"
-        )
-        if result == "ready":
-            return
-        time.sleep(1)
-    raise VPNError("NordVPN UI did not render within timeout")
+def _has_vpn_tab() -> bool:
+    """Check whether a NordVPN tab is already open in any Chrome window."""
+    try:
+        return any(NORDVPN_EXTENSION_ID in tab.url for tab in snapshot_tabs())
+    except AppleScriptError:
+        return False
+
+
+def _open_background_window() -> int:
+    """Open the NordVPN popup in a minimized Chrome window. Returns window ID.
+
+    The extension page keeps running while hidden and JS clicks don't need
+    focus, so nothing appears on the TV. The window is left open after
+    connecting so teardown and `gigaku switch` can check state in one query.
+    """
+    window_id = open_windows([WindowSpec(NORDVPN_POPUP_URL, minimized=True)])[0]
+    print(f"Opened NordVPN in background window {window_id}")
+    return window_id
+
+
+def _open_fullscreen_window(samsung: DisplayInfo) -> int:
+    """Open the NordVPN popup fullscreen on the Samsung display. Returns window ID."""
+    window_id = open_url_in_new_window(NORDVPN_POPUP_URL, samsung)
+    print(f"Opened NordVPN in Chrome window {window_id}")
+    make_window_fullscreen(window_id)
+    print(f"NordVPN window {window_id} set to fullscreen")
+    return window_id
+
+
+def _parse_state(title: str | None) -> str | None:
+    """Map the connection card title to a country name, or None if disconnected."""
+    if not title or title == "unknown" or title == "Connect to VPN":
+        return None
+    return title
+
+
+def _wait_for_ui(timeout: float = 15) -> str | None:
+    """Wait for the NordVPN React UI to render and return the connection state.
+
+    Readiness and state come from the same query, so an already rendered tab
+    answers on the first call.
+    """
+    wait = WaitBudget("vpn_ui", timeout=timeout, interval=0.5)
+    for _ in wait.polls():
+        state = _helper("vpnState")
+        if state and state["ready"]:
+            wait.done()
+            return _parse_state(state["title"])
+    raise VPNError(f"NordVPN UI did not render within {wait.timeout:.0f}s")
 
 
 def _get_connection_state() -> str | None:
     """Check current VPN connection state. Returns country name or None if disconnected."""
-    result = _exec_js(
-        "var title = document.querySelector('[data-testid=\"connection-card-title\"]');"
-        " title ? title.textContent : 'unknown'"
-    )
-    if not result or result == "unknown" or result == "Connect to VPN":
+    return _parse_state(_helper("text", '[data-testid="connection-card-title"]'))
+
+
+# Plain DOM read for peek_state(), so peeking leaves no runtime behind
+_PEEK_TITLE_JS = """(document.querySelector('[data-testid="connection-card-title"]') || {}).textContent || ''"""
+
+
+def peek_state() -> str | None:
+    """Connection state from an already open NordVPN tab, without opening one.
+
+    Read-only: Chrome isn't launched and the page runtime isn't installed.
+    Returns the connected country, "disconnected", or None if Chrome isn't
+    running or no tab is open.
+    """
+    try:
+        if not is_running():
+            return None
+        # One call: a missing tab surfaces as the lookup failing
+        return _parse_state(_exec_js(_PEEK_TITLE_JS)) or "disconnected"
+    except AppleScriptError:
         return None
-    return result
 
 
-def _disconnect(timeout: int = 15) -> None:
+def _disconnect(timeout: float = 15) -> None:
     """Disconnect from current VPN server."""
-    _exec_js(
-        "var btn = document.querySelector('[data-testid=\"connection-card-disconnect-button\"]');"
-        " if (btn) { btn.click(); 'clicked' } else { 'no button' }"
-    )
+    _helper("click", '[data-testid="connection-card-disconnect-button"]')
     print("Disconnecting...")
-    deadline = time.time() + timeout
-    while time.time() < deadline:
-        result = _exec_js(
-            "document.querySelector('[data-testid=\"connection-card-disconnect-button\"]')"
-            " ? 'connected' : 'disconnected'"
-        )
-        if result == "disconnected":
+    wait = WaitBudget("vpn_disconnect", timeout=timeout, interval=1)
+    for _ in wait.polls():
+        state = _helper("vpnState")
+        if state and not state["connected"]:
+            wait.done()
             print("Disconnected")
-            time.sleep(1)
+            context.sleep(1)
             return
-        time.sleep(1)
-    raise VPNError("Failed to disconnect within timeout")
+    raise VPNError(f"Failed to disconnect within {wait.timeout:.0f}s")
 
 
-def _connect(country: str, timeout: int = 30) -> None:
+def _connect(country: str, timeout: float = 30) -> None:
     """Search for a country and connect."""
-    _exec_js(
-        "var input = document.querySelector('[data-testid=\"location-card-search-input\"]');"
-        " var setter = Object.getOwnPropertyDescriptor(window.HTMLInputElement.prototype, 'value').set;"
-        f" setter.call(input, '{country}');"
-        " input.dispatchEvent(new Event('input', {bubbles: true}));"
-        " 'searched'"
-    )
+    _helper("setInput", '[data-testid="location-card-search-input"]', country)
     print(f"Searching for {country}...")
-    time.sleep(1)
+    context.sleep(1)
 
-    result = _exec_js(
-        f"var btn = document.querySelector('[role=\"button\"][aria-label=\"{country}\"]');"
-        " if (btn) { btn.click(); 'clicked' } else { 'not found' }"
-    )
-    if result != "clicked":
+    if not _helper("click", f'[role="button"][aria-label="{country}"]'):
         raise VPNError(f"{country} not found in NordVPN country list")
 
     print(f"Connecting to {country}...")
 
-    deadline = time.time() + timeout
-    while time.time() < deadline:
+    wait = WaitBudget("vpn_connect", timeout=timeout, interval=2)
+    for _ in wait.polls():
         state = _get_connection_state()
         if state and country in state:
+            wait.done()
             print(f"Connected to {state}")
             return
-        time.sleep(2)
-    raise VPNError(f"Failed to connect to {country} within timeout")
+    raise VPNError(f"Failed to connect to {country} within {wait.timeout:.0f}s")
 
 
 def run(samsung: DisplayInfo, country: str | None = None) -> None:
     """Connect to or disconnect from VPN via NordVPN Chrome extension.
 
+    Reuses an open NordVPN tab when there is one, so the no-op cases cost a
+    single query. Otherwise the popup is loaded in a minimized window; a
+    fullscreen window on the Samsung display is only opened if that hidden
+    page fails to render.
+
     Args:
-        samsung: Samsung display info for window placement.
+        samsung: Samsung display info for the fallback window placement.
         country: Country to connect to (e.g. "Japan"), or None to disconnect.
     """
-    window_id = open_url_in_new_window(NORDVPN_POPUP_URL, samsung)
-    print(f"Opened NordVPN in Chrome window {window_id}")
-    make_window_fullscreen(window_id)
-    print(f"NordVPN window {window_id} set to fullscreen")
-
-    _wait_for_ui()
-
-    state = _get_connection_state()
+    fullscreen_window_id = None
+    if not _has_vpn_tab():
+        _open_background_window()
+    try:
+        state = _wait_for_ui()
+    except VPNError:
+        print("NordVPN did not render in the background, opening a window...")
+        _close_vpn_tabs()
+        fullscreen_window_id = _open_fullscreen_window(samsung)
+        state = _wait_for_ui()
 
     if country is None:
         # Disconnect mode
@@ -149,21 +195,21 @@ def run(samsung: DisplayInfo, country: str | None = None) -> None:
         else:
             print(f"Currently connected to {state}")
             _disconnect()
-        _close_vpn_window(window_id)
+        _close_vpn_tabs()
         return
 
     # Connect mode
     if state and country in state:
         print(f"Already connected to {state}")
-        _close_vpn_window(window_id)
-        return
-
-    if state:
-        print(f"Currently connected to {state}")
-        _disconnect()
+    else:
+        if state:
+            print(f"Currently connected to {state}")
+            _disconnect()
+        _connect(country)
 
-    _connect(country)
-    _close_vpn_window(window_id)
+    # The background window stays for later checks; a window on the TV does not
+    if fullscreen_window_id is not None:
+        _close_vpn_tabs()
 
 
 if __name__ == "__main__":
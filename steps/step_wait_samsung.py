@@ -2,24 +2,42 @@
 """Poll until Samsung TV display is connected."""
 
 import sys
-import time
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from lib.config import POLL_INTERVAL
-from lib.display import DisplayInfo, find_samsung_display, list_displays
+from dataclasses import asdict
+
+from lib import context, state
+from lib.config import POLL_INTERVAL, SAMSUNG_VENDOR_IDS
+from lib.display import DisplayInfo, display_info, find_samsung_display, list_displays
+
+
+def _last_samsung() -> DisplayInfo | None:
+    """The Samsung display from the last run, if it is still active as the same display."""
+    cached = state.get("samsung_display")
+    if not isinstance(cached, dict) or "display_id" not in cached:
+        return None
+    samsung = display_info(cached["display_id"])
+    if samsung is None or samsung.builtin or samsung.vendor not in SAMSUNG_VENDOR_IDS:
+        return None
+    return samsung
 
 
 def run() -> DisplayInfo:
     """Block until a Samsung display appears, then return its info."""
+    samsung = _last_samsung()
+    if samsung is not None:
+        print(f"Samsung TV connected ({samsung.width}x{samsung.height} at {samsung.x},{samsung.y})")
+        return samsung
     print("Connect the Samsung TV display...")
     while True:
         samsung = find_samsung_display()
         if samsung is not None:
+            state.put("samsung_display", asdict(samsung))
             print(f"Samsung TV detected! ({samsung.width}x{samsung.height} at {samsung.x},{samsung.y})")
             return samsung
-        time.sleep(POLL_INTERVAL)
+        context.sleep(POLL_INTERVAL)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,5 @@
+"""lib.config reads the Chrome backend at import, so pick the in-memory one before any test imports lib."""
+
+import os
+
+os.environ["GIGAKU_CHROME_BACKEND"] = "fake"
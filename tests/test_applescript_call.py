@@ -0,0 +1,37 @@
+"""applescript.call(): non-script Apple Event senders share the executor, its stats and cancellation."""
+
+import threading
+
+import pytest
+
+from lib import applescript, context
+
+
+@pytest.fixture(autouse=True)
+def fresh_context():
+    context.start(name="test")
+    yield
+    context.start(name="test")
+
+
+def test_call_runs_inline_and_records_latency():
+    assert applescript.call({"test": "inline"}, lambda: [1, 2], "tests.inline") == [1, 2]
+    assert applescript.executor_stats()["latency"]["tests.inline"]["count"] >= 1
+
+
+def test_call_from_worker_runs_on_main_thread():
+    ran_on = []
+
+    def program():
+        return applescript.call({"test": "queued"}, lambda: ran_on.append(threading.current_thread()), "tests.queued")
+
+    applescript.serve(program)
+    assert ran_on == [threading.main_thread()]
+
+
+def test_call_skips_live_once_cancelled():
+    calls = []
+    context.current().cancel("stop")
+    with pytest.raises(context.Cancelled):
+        applescript.call({"test": "cancelled"}, lambda: calls.append(1), "tests.cancelled")
+    assert calls == []
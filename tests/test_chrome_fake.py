@@ -0,0 +1,59 @@
+"""lib.chrome against the in-memory backend (see conftest.py), so these run without Chrome (e.g. on Linux)."""
+
+import pytest
+
+from lib import chrome, chrome_fake
+from lib.applescript import AppleScriptError
+from lib.chrome import WindowSpec
+from lib.display import DisplayInfo
+
+SAMSUNG = DisplayInfo(display_id=2, x=1512, y=0, width=1920, height=1080, vendor=0x4C2D, builtin=False)
+
+
+@pytest.fixture(autouse=True)
+def fake_chrome():
+    assert chrome.CHROME_BACKEND == "fake", "lib.config was imported before the backend was set"
+    chrome_fake.reset()
+    yield
+    chrome_fake.reset()
+
+
+def test_open_windows_places_windows_in_spec_order():
+    bounds = chrome.display_bounds(SAMSUNG)
+    ci, migaku = chrome.open_windows([
+        WindowSpec("https://www.netflix.com/watch/1", bounds),
+        WindowSpec("https://study.migaku.com", minimized=True),
+    ])
+    assert chrome.get_window_bounds(ci) == bounds
+    assert chrome_fake.windows[0].window_id == migaku
+    assert chrome_fake.windows[0].minimized
+
+
+def test_move_window_to_display_places_and_focuses():
+    chrome_fake.add_window(1, (0, 25, 800, 625))
+    chrome_fake.add_window(2, (0, 25, 800, 625))
+    chrome.move_window_to_display(2, SAMSUNG)
+    assert chrome.list_windows()[0] == (2, chrome.display_bounds(SAMSUNG, inset=100))
+
+
+def test_close_tabs_matching_closes_only_matches():
+    chrome_fake.add_window(1, (0, 25, 800, 625), "https://www.netflix.com/browse")
+    chrome_fake.add_window(2, (0, 25, 800, 625), "https://study.migaku.com")
+    assert chrome.close_tabs_matching(lambda tab: "netflix" in tab.url) == 1
+    assert [tab.url for tab in chrome.snapshot_tabs()] == ["https://study.migaku.com"]
+
+
+def test_set_window_url_and_missing_window():
+    chrome_fake.add_window(1, (0, 25, 800, 625))
+    chrome.set_window_url(1, "https://example.com")
+    assert chrome.snapshot_tabs()[0].url == "https://example.com"
+    with pytest.raises(AppleScriptError):
+        chrome.set_window_url(9, "https://example.com")
+
+
+def test_exec_js_batch_on_extension():
+    chrome_fake.add_window(1, (0, 25, 800, 625), "chrome-extension://abc/app.html")
+    chrome_fake.js_handler = lambda window, js: '{"hash": "#/", "header": null}'
+    assert chrome.exec_js_batch("abc", {"hash": "1", "header": "2"}) == {"hash": "#/", "header": None}
+    with pytest.raises(AppleScriptError):
+        chrome.exec_js_batch("missing", {"hash": "1"})
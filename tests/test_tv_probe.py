@@ -0,0 +1,57 @@
+"""TCP reachability probe against local sockets, and is_reachable()'s TTL cache."""
+
+import socket
+import time
+
+import pytest
+
+from lib import tv
+from lib.config import TV_PROBE_TIMEOUT
+
+
+@pytest.fixture
+def listeners():
+    socks = []
+    for _ in range(2):
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.bind(("127.0.0.1", 0))
+        s.listen()
+        socks.append(s)
+    yield [s.getsockname()[1] for s in socks]
+    for s in socks:
+        s.close()
+
+
+@pytest.fixture
+def closed_port():
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+def test_probe_reports_each_port(listeners, closed_port):
+    ports = (*listeners, closed_port)
+    start = time.monotonic()
+    result = tv.probe("127.0.0.1", ports)
+    assert time.monotonic() - start < TV_PROBE_TIMEOUT
+    assert result == {listeners[0]: True, listeners[1]: True, closed_port: False}
+
+
+def test_is_reachable_caches_for_ttl(monkeypatch):
+    calls = []
+
+    def probe():
+        calls.append(time.monotonic())
+        return {tv.TV_UPNP_PORT: True}
+
+    monkeypatch.setattr(tv, "probe", probe)
+    monkeypatch.setattr(tv, "_health", None)
+    assert tv.is_reachable(max_age=60)
+    assert tv.is_reachable(max_age=60)
+    assert len(calls) == 1
+    checked_at, reachable = tv._health
+    tv._health = (checked_at - 61, reachable)
+    assert tv.is_reachable(max_age=60)
+    assert len(calls) == 2